@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Run the benchmarks headless and compare them against the stored baseline.
+
+    python -m benchmarks [-k NAME] [--update-baseline] [--tolerance 0.3]
+
+The exit status is 1 if any median regressed past the tolerance, unless --quick
+is given.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks import harness
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _load_baseline(path):
+    """Return the stored baseline, or an empty one if there is none yet."""
+    try:
+        with open(path, "r") as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {"machine": None, "results": {}}
+
+
+def _print_rows(rows):
+    """Print the results next to their baselines."""
+    print(
+        f"{'benchmark':<44} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} "
+        f"{'base p50':>10}  verdict"
+    )
+    for name, stats, base_stats, verdict in rows:
+        base_p50 = f"{base_stats['p50_ms']:.4f}" if base_stats else "-"
+        print(
+            f"{name:<44} {stats['p50_ms']:>10.4f} {stats['p90_ms']:>10.4f} "
+            f"{stats['p99_ms']:>10.4f} {base_p50:>10}  {verdict}"
+        )
+
+
+def main(argv):
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Time Wordbook's hot paths."
+    )
+    parser.add_argument("-k", metavar="NAME", help="only run benchmarks matching NAME")
+    parser.add_argument(
+        "--baseline", default=BASELINE_FILE, help="baseline file to compare against"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=harness.TOLERANCE,
+        help="how much slower a median may get, as a fraction",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="time fewer calls, for a smoke test that never fails",
+    )
+    parser.add_argument("--json", metavar="FILE", help="also write the results here")
+    args = parser.parse_args(argv)
+    if args.update_baseline and args.quick:
+        parser.error("a baseline can't be taken with --quick")
+
+    home = harness.prepare()
+    try:
+        # Imported once the XDG directories point into the temporary home.
+        from benchmarks import bench_lookup, bench_startup  # noqa: F401
+
+        results = harness.run(args.k, 0.1 if args.quick else 1.0)
+    finally:
+        harness.cleanup(home)
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+    baseline = _load_baseline(args.baseline)
+    if args.update_baseline:
+        baseline["machine"] = harness.machine()
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        _print_rows(harness.compare(results, {}))
+        return 0
+
+    if baseline["machine"] not in (None, harness.machine()):
+        print(
+            f"The baseline was taken on {baseline['machine']}, so timings may not "
+            "compare. Run with --update-baseline on this machine first.",
+            file=sys.stderr,
+        )
+    rows = harness.compare(results, baseline["results"], args.tolerance)
+    _print_rows(rows)
+    regressions = [row[0] for row in rows if row[3] == "REGRESSION"]
+    if regressions and args.quick:
+        print("Too few calls were timed to tell regressions apart from noise.")
+    elif regressions:
+        print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+bench_lookup times each step of a search, from cleaning the input to markup.
+
+bench_lookup is a part of Wordbook.
+"""
+
+import itertools
+import random
+
+from benchmarks.harness import Skip, benchmark, fixture_wordnet, synthetic_lemmas
+
+# Words with many senses over several parts of speech, the slowest to show.
+POLYSEMOUS = ("set", "run", "take")
+RAW_INPUTS = (
+    "dog",
+    "  ice cream\n",
+    '"domestic dog"',
+    "(axes)",
+    "<b>take</b>",
+    "running?",
+    "[geese]!",
+    "set-",
+)
+CUSTOM_DEFINITION = {
+    "term": "wordbook",
+    "pronunciation": "/ˈwɝdbʊk/",
+    "out_string": (
+        "wordbook ~ <b>noun</b>\n  <b>1</b>: a book of words\n"
+        '        <span foreground="$SENCOL">Look it up in the wordbook.</span>\n'
+        '        Synonyms:<i> <span foreground="$WORDCOL">'
+        '<a href="search;dictionary">dictionary</a></span></i>'
+    ),
+}
+# Search terms typed a letter at a time, one completion per keystroke.
+TYPED = ("dictionary", "wordbook", "pronunciation", "set", "quickly", "zzyzx")
+
+
+@benchmark("cleaner", repeat=2000)
+def bench_cleaner():
+    from wordbook import base
+
+    return {"inputs": lambda: [base.cleaner(text) for text in RAW_INPUTS]}
+
+
+@benchmark("get_wn_definition")
+def bench_get_wn_definition():
+    from wordbook import base
+
+    wn_instance = fixture_wordnet()
+    return {
+        term: lambda term=term: base.get_wn_definition(
+            term, "green", "blue", wn_instance
+        )
+        for term in POLYSEMOUS
+    }
+
+
+@benchmark("get_definition")
+def bench_get_definition():
+    from wordbook import base
+
+    wn_instance = fixture_wordnet()
+    # Looked up from the precompiled definition store, as once it's been built.
+    if not base.build_definition_store(wn_instance, wn_instance.words()).result():
+        raise Skip("the definition store couldn't be built")
+    cases = {
+        term: lambda term=term: base.get_definition(term, "green", "blue", wn_instance)
+        for term in POLYSEMOUS
+    }
+    cases["taken"] = lambda: base.get_definition("taken", "green", "blue", wn_instance)
+    return cases
+
+
+@benchmark("get_custom_def", repeat=1000)
+def bench_get_custom_def():
+    from wordbook import base
+
+    wn_instance = fixture_wordnet()
+    link = {"linkto": "set"}
+    return {
+        "markup": lambda: base.get_custom_def(
+            "wordbook", CUSTOM_DEFINITION, "green", "blue", wn_instance
+        ),
+        "linkto": lambda: base.get_custom_def(
+            "wordbook", link, "green", "blue", wn_instance
+        ),
+    }
+
+
+@benchmark("render")
+def bench_render():
+    from wordbook import base
+
+    wn_instance = fixture_wordnet()
+    try:
+        from wordbook import main  # noqa: F401 Picks the GTK versions.
+        from wordbook.window import WordbookWindow
+    except (ImportError, ValueError) as ex:
+        raise Skip(f"GTK 4 and libadwaita can't be imported: {ex}") from ex
+
+    def render(result):
+        return "\n\n".join(
+            WordbookWindow._process_pos(
+                WordbookWindow, pos, result[pos], result["word_col"], result["sen_col"]
+            )
+            for pos in base._POS_ORDER
+            if result[pos]
+        )
+
+    cases = {}
+    for term in POLYSEMOUS:
+        result = base.get_wn_definition(term, "green", "blue", wn_instance)[0]
+        cases[term] = lambda result=result["result"]: render(result)
+    return cases
+
+
+@benchmark("completion", repeat=500)
+def bench_completion():
+    from wordbook.index import PrefixIndex
+
+    lemmas = synthetic_lemmas()
+    index = PrefixIndex(lemmas)
+    keystrokes = [word[:end] for word in TYPED for end in range(1, len(word) + 1)]
+    rng = random.Random(0)
+    # One or two letters match thousands of lemmas, eight or more a handful, and
+    # a missing prefix none, which a linear scan would pay the most for.
+    prefixes = {
+        "short": [lemma[: rng.randint(1, 2)] for lemma in rng.sample(lemmas, 64)],
+        "long": [lemma[:8] for lemma in rng.sample(lemmas, 64) if len(lemma) >= 8],
+        "missing": [f"{lemma[:4]}qqz" for lemma in rng.sample(lemmas, 64)],
+    }
+
+    def cycle(terms):
+        terms = itertools.cycle(terms)
+        return lambda: index.complete(next(terms), 10)
+
+    cases = {"keystrokes": cycle(keystrokes)}
+    cases.update((name, cycle(terms)) for name, terms in prefixes.items())
+    return cases
+
+
+@benchmark("pronunciation", repeat=5, warmup=1)
+def bench_pronunciation():
+    from wordbook import base
+
+    if base._espeak_identity() == "none":
+        raise Skip("espeak-ng isn't installed")
+    lemmas = synthetic_lemmas()[::75]  # 2000 of them.
+    cases = {}
+    if base._espeak_library() is not None:
+        cases["library"] = lambda: base._espeak_pronunciations(lemmas)
+    # A process per term is far slower, so it's timed over fewer of them.
+    cases["process, 1 in 20"] = lambda: [
+        base._espeak_pronunciation(lemma) for lemma in lemmas[::20]
+    ]
+    # Generated by the warm-up, so these come from the pronunciation caches.
+    cases["cached"] = lambda: base.get_pronunciations(lemmas)
+    return cases
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+bench_startup times how long Wordbook takes to start, in a new process each time.
+
+bench_startup is a part of Wordbook.
+"""
+
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import benchmark, fixture_wordnet
+
+# Run in a new interpreter each time, as startup is only cold once per process.
+# Ready is once WordNet is loaded and the first lookup is done.
+READY_SCRIPT = """
+from wordbook import base
+wn_data = base.get_wn_file(lambda: None).result()
+base.get_data("run", "green", "blue", wn_data["instance"])
+"""
+# Everything the window needs imported before it can show its first frame.
+FIRST_FRAME_SCRIPT = """
+from wordbook import main
+from wordbook.window import WordbookWindow
+"""
+
+
+@benchmark("startup", repeat=10, warmup=1)
+def bench_startup():
+    fixture_wordnet()
+    env = dict(os.environ)
+    # The wordbook package is imported from the source tree.
+    source_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (source_dir, env.get("PYTHONPATH")) if path
+    )
+
+    def start(script):
+        return lambda: subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    cases = {"ready": start(READY_SCRIPT)}
+    try:
+        start(FIRST_FRAME_SCRIPT)()
+    except subprocess.CalledProcessError:
+        print("startup[first frame imports]: skipped, GTK 4 can't be imported")
+    else:
+        cases["first frame imports"] = start(FIRST_FRAME_SCRIPT)
+    return cases
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+harness contains the timing, baseline and fixture code of the benchmarks.
+
+harness is a part of Wordbook.
+"""
+
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+
+FIXTURE_LEXICON = os.path.join(
+    os.path.dirname(__file__), os.pardir, "tests", "data", "lexicon.xml"
+)
+# How much slower than the baseline a median may get before it's a regression,
+# and a floor in milliseconds so timer noise on tiny medians isn't one.
+TOLERANCE = 0.3
+MIN_REGRESSION_MS = 0.005
+PERCENTILES = (0.5, 0.9, 0.99)
+
+BENCHMARKS = []
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when it can't run here."""
+
+
+class Benchmark:
+    """A named group of cases, each a function timed over many calls."""
+
+    def __init__(self, name, setup, repeat, warmup):
+        self.name = name
+        self.setup = setup
+        self.repeat = repeat
+        self.warmup = warmup
+
+
+def benchmark(name, repeat=200, warmup=5):
+    """
+    Register a benchmark. The decorated function sets it up and returns a dict
+    of case names to the functions to time.
+    """
+
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, setup, repeat, warmup))
+        return setup
+
+    return decorator
+
+
+def prepare():
+    """
+    Point Wordbook's XDG directories into a temporary directory. Call before
+    importing any wordbook module, as they read the directories on import.
+    """
+    home = tempfile.mkdtemp(prefix="wordbook-benchmarks-")
+    for variable in ("XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_RUNTIME_DIR"):
+        os.environ[variable] = os.path.join(home, variable.lower())
+        os.makedirs(os.environ[variable], mode=0o700)
+    return home
+
+
+def cleanup(home):
+    """Remove the directory made by prepare()."""
+    shutil.rmtree(home, ignore_errors=True)
+
+
+@lru_cache(maxsize=None)
+def fixture_wordnet():
+    """Install the fixture lexicon and return it opened. Raises Skip without wn."""
+    try:
+        import wn  # noqa: F401
+
+        from wordbook import base, utils
+    except ImportError as ex:
+        raise Skip(f"{ex.name} isn't installed") from ex
+
+    if not base.WordnetDownloader.check_status():
+        os.makedirs(utils.WN_DIR, exist_ok=True)
+        base.WordnetDownloader.add(FIXTURE_LEXICON)
+    return base.open_wordnet()
+
+
+@lru_cache(maxsize=None)
+def synthetic_lemmas(count=150000, seed=2021):
+    """
+    Return count made-up lemmas, about as long as those of oewn:2021, with a
+    few collocations and proper nouns among them.
+    """
+    rng = random.Random(seed)
+    # Letters from the most to the least used in English, weighted to match.
+    letters = "etaoinshrdlcumwfgypbvkjxqz"
+    weights = [1 / rank for rank in range(1, len(letters) + 1)]
+    lemmas = set()
+    while len(lemmas) < count:
+        words = []
+        for _i in range(1 if rng.random() < 0.8 else 2):
+            length = max(2, min(18, int(rng.gauss(8, 3))))
+            words.append("".join(rng.choices(letters, weights, k=length)))
+        lemma = "_".join(words)
+        lemmas.add(lemma.capitalize() if rng.random() < 0.1 else lemma)
+    return sorted(lemmas)
+
+
+def percentile(durations, fraction):
+    """Return the given percentile of a sorted list of durations."""
+    return durations[min(len(durations) - 1, int(len(durations) * fraction))]
+
+
+def time_case(func, repeat, warmup):
+    """Call func repeatedly and return its statistics in milliseconds."""
+    for _i in range(warmup):
+        func()
+    durations = []
+    for _i in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    stats = {
+        f"p{fraction * 100:g}_ms": percentile(durations, fraction)
+        for fraction in PERCENTILES
+    }
+    stats["mean_ms"] = sum(durations) / len(durations)
+    stats["max_ms"] = durations[-1]
+    return {name: round(value, 4) for name, value in stats.items()}
+
+
+def run(pattern=None, repeat_scale=1.0, report=print):
+    """Run the benchmarks whose names contain pattern. Returns their results."""
+    results = {}
+    for bench in BENCHMARKS:
+        if pattern and pattern not in bench.name:
+            continue
+        try:
+            cases = bench.setup()
+        except Skip as ex:
+            report(f"{bench.name}: skipped, {ex}")
+            continue
+        repeat = max(1, int(bench.repeat * repeat_scale))
+        for case, func in cases.items():
+            name = f"{bench.name}[{case}]"
+            results[name] = time_case(func, repeat, bench.warmup)
+    return results
+
+
+def machine():
+    """Describe the machine, as baselines only compare on the same one."""
+    processor = platform.processor() or platform.machine()
+    return f"{processor}, {os.cpu_count()} CPUs, Python {platform.python_version()}"
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Return a (name, current, baseline, verdict) row per result. A median more
+    than tolerance slower than the baseline's is a regression.
+    """
+    rows = []
+    for name, stats in results.items():
+        base_stats = baseline.get(name)
+        if base_stats is None:
+            verdict = "new"
+        elif (
+            stats["p50_ms"]
+            > base_stats["p50_ms"] * (1 + tolerance) + MIN_REGRESSION_MS
+        ):
+            verdict = "REGRESSION"
+        elif stats["p50_ms"] < base_stats["p50_ms"] * (1 - tolerance):
+            verdict = "faster"
+        else:
+            verdict = "ok"
+        rows.append((name, stats, base_stats, verdict))
+    return rows
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+conftest sets up a throwaway home for the tests and the fixture lexicon.
+
+Wordbook finds its files through the XDG directories, so they point into a
+temporary directory before any wordbook module is imported.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+FIXTURE_LEXICON = os.path.join(os.path.dirname(__file__), "data", "lexicon.xml")
+
+_HOME = tempfile.mkdtemp(prefix="wordbook-tests-")
+for _variable in ("XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_RUNTIME_DIR"):
+    os.environ[_variable] = os.path.join(_HOME, _variable.lower())
+    os.makedirs(os.environ[_variable], mode=0o700)
+
+
+def pytest_unconfigure(config):
+    """Remove the temporary home once the tests are done."""
+    shutil.rmtree(_HOME, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def wordnet_db():
+    """Import the fixture lexicon into wn.db and return the path of the database."""
+    pytest.importorskip("gi")
+    pytest.importorskip("wn")
+    from wordbook import base, utils
+
+    if not base.WordnetDownloader.check_status():
+        os.makedirs(utils.WN_DIR, exist_ok=True)
+        base.WordnetDownloader.add(FIXTURE_LEXICON)
+    return os.path.join(utils.WN_DIR, "wn.db")
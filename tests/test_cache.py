@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+
+from wordbook.cache import DiskCache, LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache("Test", maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used.
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_counts_hits_and_misses():
+    cache = LRUCache("Test", maxsize=4)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b", "default")
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats() == "Test cache: 1 hits, 1 misses (50.0%), 1/4 entries"
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_disk_cache_round_trip(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = DiskCache("Test", path)
+    assert cache.get("dog") is None
+    cache.put("dog", "/dɔɡ/")
+    assert cache.get("dog") == "/dɔɡ/"
+    # A new instance reads what the old one wrote.
+    assert DiskCache("Test", path).get("dog") == "/dɔɡ/"
+
+
+def test_disk_cache_counts_only_new_keys(tmp_path):
+    cache = DiskCache("Test", str(tmp_path / "cache.db"), max_entries=3)
+    for _i in range(10):
+        cache.put("dog", "value")
+    assert cache.stats().endswith("1/3 entries")
+    cache.put("cat", "value")
+    assert cache.stats().endswith("2/3 entries")
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache("Test", str(tmp_path / "cache.db"), max_entries=10)
+    for i in range(10):
+        cache.put(str(i), str(i))
+    # Hits are remembered in memory and written before the next eviction.
+    assert cache.get("0") == "0"
+    cache.put("10", "10")
+    assert cache.get("0") == "0"
+    assert cache.get("1") is None
+    assert cache.stats().endswith("9/10 entries")
+
+
+def test_disk_cache_writes_hits_in_batches(tmp_path):
+    cache = DiskCache("Test", str(tmp_path / "cache.db"), touch_batch=3)
+    for key in ("dog", "cat", "axe"):
+        cache.put(key, "value")
+    cache.get("dog")
+    cache.get("cat")
+    assert cache._touched
+    cache.get("axe")
+    assert not cache._touched
+    assert (cache.hits, cache.misses) == (3, 0)
+
+
+def test_disk_cache_survives_unusable_path(tmp_path):
+    path = os.path.join(str(tmp_path), "missing", "cache.db")
+    cache = DiskCache("Test", path)
+    cache.put("dog", "value")
+    assert cache.get("dog") is None
+    assert cache.misses == 1
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import gzip
+import hashlib
+import os
+import random
+
+import pytest
+
+pytest.importorskip("gi")
+requests = pytest.importorskip("requests")
+
+from wordbook import download  # noqa: E402
+
+ARCHIVE = gzip.compress(random.Random(0).randbytes(200000))
+URL = "https://example.com/english-wordnet-2021.xml.gz"
+
+
+class FakeProgress:
+    """Records what a download reports, like wn's ProgressHandler."""
+
+    def __init__(self):
+        self.count = 0
+        self.statuses = []
+
+    def set(self, status=None, count=None, total=None):
+        if status is not None:
+            self.statuses.append(status)
+        if count is not None:
+            self.count = count
+
+    def update(self, count):
+        self.count += count
+
+
+class FakeResponse:
+    """Serves ARCHIVE the way a server supporting ranges would."""
+
+    def __init__(self, body=ARCHIVE, headers=None, etag='"v1"', cut_at=None):
+        headers = headers or {}
+        self.headers = {"ETag": etag, "Content-Length": str(len(body))}
+        self.status_code = 200
+        self.body = body
+        if "Range" in headers and headers.get("If-Range", etag) == etag:
+            start = int(headers["Range"][len("bytes=") : -1])
+            if start >= len(body):
+                self.status_code = 416
+            else:
+                self.status_code = 206
+                self.body = body[start:]
+                self.headers["Content-Length"] = str(len(self.body))
+                self.headers["Content-Range"] = (
+                    f"bytes {start}-{len(body) - 1}/{len(body)}"
+                )
+        # A dropped connection still ends the body, just too soon.
+        self.sent = self.body if cut_at is None else self.body[:cut_at]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.sent), chunk_size):
+            yield self.sent[start : start + chunk_size]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Replace requests.get, recording the headers of each request."""
+    requests_made = []
+    behaviour = {"cut_at": None, "etag": '"v1"'}
+
+    def get(url, headers=None, **_kwargs):
+        requests_made.append(dict(headers or {}))
+        response = FakeResponse(
+            headers=headers, etag=behaviour["etag"], cut_at=behaviour["cut_at"]
+        )
+        behaviour["cut_at"] = None  # Only the first attempt is cut short.
+        return response
+
+    monkeypatch.setattr(download.requests, "get", get)
+    return requests_made, behaviour
+
+
+def test_fetch_downloads_the_archive(tmp_path, server):
+    progress = FakeProgress()
+    path = download.fetch([URL], str(tmp_path), progress)
+    assert path == str(tmp_path / "english-wordnet-2021.xml.gz")
+    with open(path, "rb") as archive:
+        assert archive.read() == ARCHIVE
+    assert progress.count == len(ARCHIVE)
+    assert progress.statuses[-1] == "Complete"
+    assert not os.path.exists(path + ".part")
+
+
+def test_fetch_resumes_a_cut_download(tmp_path, server):
+    requests_made, behaviour = server
+    behaviour["cut_at"] = 1000
+    with pytest.raises(requests.RequestException):
+        download.fetch([URL], str(tmp_path), FakeProgress())
+    path = download.fetch([URL], str(tmp_path), FakeProgress())
+    assert requests_made[-1] == {"Range": "bytes=1000-", "If-Range": '"v1"'}
+    with open(path, "rb") as archive:
+        assert archive.read() == ARCHIVE
+
+
+def test_fetch_starts_over_when_the_file_changed(tmp_path, server):
+    _requests_made, behaviour = server
+    behaviour["cut_at"] = 1000
+    with pytest.raises(requests.RequestException):
+        download.fetch([URL], str(tmp_path), FakeProgress())
+    behaviour["etag"] = '"v2"'
+    path = download.fetch([URL], str(tmp_path), FakeProgress())
+    with open(path, "rb") as archive:
+        assert archive.read() == ARCHIVE
+
+
+def test_fetch_skips_a_downloaded_archive(tmp_path, server):
+    requests_made, _behaviour = server
+    download.fetch([URL], str(tmp_path), FakeProgress())
+    download.fetch([URL], str(tmp_path), FakeProgress())
+    assert len(requests_made) == 1
+
+
+def test_fetch_tries_the_next_url(tmp_path, monkeypatch):
+    def get(url, **_kwargs):
+        if "mirror" not in url:
+            raise requests.ConnectionError("unreachable")
+        return FakeResponse()
+
+    monkeypatch.setattr(download.requests, "get", get)
+    urls = [URL, "https://mirror.example.com/english-wordnet-2021.xml.gz"]
+    assert os.path.isfile(download.fetch(urls, str(tmp_path), FakeProgress()))
+
+
+def test_verify_accepts_a_good_archive(tmp_path):
+    path = tmp_path / "archive.xml.gz"
+    path.write_bytes(ARCHIVE)
+    progress = FakeProgress()
+    download.verify(str(path), hashlib.sha256(ARCHIVE).hexdigest(), progress)
+    assert progress.count == 2 * len(ARCHIVE)
+
+
+def test_verify_rejects_a_wrong_checksum(tmp_path):
+    path = tmp_path / "archive.xml.gz"
+    path.write_bytes(ARCHIVE)
+    with pytest.raises(download.VerificationError):
+        download.verify(str(path), hashlib.sha256(b"other").hexdigest())
+
+
+def test_verify_rejects_a_truncated_archive(tmp_path):
+    path = tmp_path / "archive.xml.gz"
+    path.write_bytes(ARCHIVE[: len(ARCHIVE) // 2])
+    with pytest.raises(download.VerificationError):
+        download.verify(str(path))
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from wordbook.index import PrefixIndex, TrigramIndex, edit_distance, normalize
+
+WORDS = ["dog", "Dog", "domestic_dog", "dogma", "cat", "catalog", "Catalan", "axe"]
+
+
+def test_normalize():
+    assert normalize("Domestic_Dog") == "domestic dog"
+    assert normalize("STRASSE") == normalize("straße")
+
+
+def test_edit_distance():
+    assert edit_distance("", "") == 0
+    assert edit_distance("dog", "dog") == 0
+    assert edit_distance("dog", "dgo") == 2
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("ax", "axe") == edit_distance("axe", "ax") == 1
+
+
+def test_complete_is_case_insensitive_and_sorted():
+    index = PrefixIndex(WORDS)
+    assert len(index) == len(WORDS)
+    assert index.complete("do") == ["Dog", "dog", "dogma", "domestic dog"]
+    assert index.complete("CAT") == ["cat", "Catalan", "catalog"]
+
+
+def test_complete_normalizes_underscores():
+    index = PrefixIndex(WORDS)
+    assert index.complete("domestic_d") == ["domestic dog"]
+    assert index.complete("domestic d") == ["domestic dog"]
+
+
+def test_complete_limit_and_misses():
+    index = PrefixIndex(WORDS)
+    assert index.complete("do", limit=2) == ["Dog", "dog"]
+    assert index.complete("zebra") == []
+    assert index.complete("") == index.complete("", limit=10)[:10]
+    assert PrefixIndex().complete("do") == []
+
+
+def test_complete_drops_duplicates():
+    index = PrefixIndex(["ice_cream", "ice cream", "ice cream"])
+    assert index.complete("ice") == ["ice cream"]
+
+
+def test_suggest_ranks_by_edit_distance():
+    index = TrigramIndex(WORDS)
+    assert len(index) == len(WORDS)
+    assert index.suggest("dgo")[:1] == []  # Too far from anything this short.
+    assert index.suggest("catalogs") == ["catalog"]
+    assert index.suggest("catalgo") == ["Catalan", "catalog"]
+    assert index.suggest("dogm") == ["Dog", "dog", "dogma"]
+    assert index.suggest("catalog")[0] == "catalog"
+
+
+def test_suggest_respects_limit():
+    index = TrigramIndex(["dog", "dot", "don", "doe", "dig"])
+    suggestions = index.suggest("dox", limit=3)
+    assert len(suggestions) == 3
+    assert "dig" not in suggestions
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import pytest
+
+from wordbook.morphology import Morphology
+
+LEMMAS = [
+    ("dog", "n"),
+    ("Dog", "n"),
+    ("axis", "n"),
+    ("ax", "n"),
+    ("axe", "n"),
+    ("goose", "n"),
+    ("ice cream", "n"),
+    ("give", "v"),
+    ("give up", "v"),
+    ("run", "n"),
+    ("run", "v"),
+    ("stop", "n"),
+    ("stop", "v"),
+    ("take", "n"),
+    ("take", "v"),
+    ("good", "a"),
+    ("fast", "a"),
+    ("swift", "s"),
+    ("wife", "n"),
+    ("church", "n"),
+    ("fly", "n"),
+    ("fly", "v"),
+    ("make", "v"),
+]
+EXCEPTIONS = [
+    ("axes", "axis", "n"),
+    ("geese", "goose", "n"),
+    ("ran", "run", "v"),
+    ("took", "take", "v"),
+    ("better", "good", "a"),
+]
+
+
+@pytest.fixture
+def morphology():
+    return Morphology(LEMMAS, EXCEPTIONS)
+
+
+@pytest.mark.parametrize(
+    "form, lemmas",
+    [
+        ("dogs", [("dog", "n"), ("Dog", "n")]),
+        ("wives", [("wife", "n")]),
+        ("churches", [("church", "n")]),
+        ("flies", [("fly", "n"), ("fly", "v")]),
+        ("runs", [("run", "n"), ("run", "v")]),
+        ("making", [("make", "v")]),
+        ("stopped", [("stop", "v")]),
+        ("running", [("run", "v")]),
+        ("faster", [("fast", "a")]),
+        ("swifter", [("swift", "a")]),
+        ("geese", [("goose", "n")]),
+        ("ran", [("run", "v")]),
+        ("took", [("take", "v")]),
+        ("better", [("good", "a")]),
+        ("dog's", [("dog", "n"), ("Dog", "n")]),
+        ("ice creams", [("ice cream", "n")]),
+        ("gave up", []),
+        ("giving up", [("give up", "v")]),
+        ("zzz", []),
+    ],
+)
+def test_candidates(morphology, form, lemmas):
+    assert morphology.candidates(form) == lemmas
+
+
+def test_irregular_and_regular_candidates_are_merged(morphology):
+    # "axes" is listed under "axis", and is also "axe" or "ax" plus "-es".
+    assert morphology.candidates("axes") == [("axis", "n"), ("axe", "n"), ("ax", "n")]
+
+
+def test_case_variants_follow_the_typed_spelling(morphology):
+    assert morphology.candidates("dogs") == [("dog", "n"), ("Dog", "n")]
+    assert morphology.candidates("Dogs") == [("Dog", "n"), ("dog", "n")]
+    assert morphology.candidates("DOGS") == [("dog", "n"), ("Dog", "n")]
+
+
+def test_lemmas_without_a_part_of_speech_take_every_rule():
+    morphology = Morphology([("run", None)])
+    assert morphology.candidates("running") == [("run", None)]
+    assert morphology.candidates("runs") == [("run", None)]
+
+
+def test_base_forms(morphology):
+    assert morphology.base_forms("dog") == [("dog", None)]
+    assert morphology.base_forms("DOG") == [("DOG", None)]  # WordNet finds any case.
+    assert morphology.base_forms("ice_cream") == [("ice_cream", None)]
+    assert morphology.base_forms("geese") == [("goose", "n")]
+    assert morphology.base_forms("zzz") == [("zzz", None)]
+
+
+def test_lemmatize_is_memoized(morphology):
+    assert morphology.lemmatize("geese") == (("goose", "n"),)
+    assert morphology.lemmatize("geese") == (("goose", "n"),)
+    assert morphology.stats().startswith("Base form cache: 1 hits, 1 misses")
+
+
+@pytest.mark.parametrize("form, lemma", [("took", "take"), ("ran", "run")])
+def test_inflected_verbs_get_no_noun_senses(wordnet_db, form, lemma):
+    from wordbook import base
+
+    clean_def, failed = base.get_definition(
+        form, "green", "blue", base.open_wordnet()
+    )
+    assert not failed
+    assert clean_def["base_forms"] == [lemma]
+    assert clean_def["result"]["verb"]
+    assert not clean_def["result"]["noun"]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import pytest
+
+from wordbook.relations import RelationFetcher
+
+# The fixture lexicon stands in for the lexicon Wordbook installs.
+FIXTURE_ID = "oewn:2021"
+
+
+@pytest.fixture
+def fetcher(wordnet_db):
+    fetcher = RelationFetcher(wordnet_db)
+    yield fetcher
+    fetcher.close()
+
+
+def test_fetch_reads_every_detail(fetcher):
+    details = fetcher.fetch([FIXTURE_ID], ["oewn-00000001-n", "oewn-00000010-a"])
+    assert details["oewn-00000001-n"] == {
+        "id": "oewn-00000001-n",
+        "lemmas": ["dog", "domestic dog"],
+        "definition": "a member of the genus Canis that has been domesticated by man",
+        "examples": ["the dog barked all night"],
+        "ant": [],
+        "sim": [],
+        "also": [],
+    }
+    assert details["oewn-00000010-a"]["ant"] == ["bad"]
+
+
+def test_fetch_reads_synset_relations(fetcher):
+    details = fetcher.fetch([FIXTURE_ID], ["oewn-00000012-a", "oewn-00000013-s"])
+    assert details["oewn-00000012-a"]["also"] == ["good"]
+    assert details["oewn-00000013-s"]["sim"] == ["fast"]
+
+
+def test_fetch_ignores_unknown_synsets_and_lexicons(fetcher):
+    assert fetcher.fetch([FIXTURE_ID], ["oewn-99999999-n"]) == {}
+    assert fetcher.fetch([FIXTURE_ID], []) == {}
+    assert fetcher.fetch(["xwn:1.0"], ["oewn-00000001-n"]) == {}
+
+
+def test_fetch_stops_once_cancelled(fetcher):
+    checks = []
+
+    def cancelled():
+        checks.append(None)
+        return len(checks) > 2
+
+    assert fetcher.fetch([FIXTURE_ID], ["oewn-00000001-n"], cancelled) is None
+    assert len(checks) == 3
+
+
+def test_fetch_forms(fetcher):
+    forms = fetcher.fetch_forms([FIXTURE_ID])
+    assert ("geese", "goose", "n") in forms
+    assert ("ran", "run", "v") in forms
+    assert ("axes", "axis", "n") in forms
+    assert fetcher.fetch_forms(["xwn:1.0"]) == []
+
+
+def test_fetch_lemmas(fetcher):
+    lemmas = fetcher.fetch_lemmas([FIXTURE_ID])
+    assert ("run", "n") in lemmas
+    assert ("run", "v") in lemmas
+    assert ("took", "v") not in lemmas
+    assert fetcher.fetch_lemmas(["xwn:1.0"]) == []
+
+
+def test_close_reopens_on_next_use(fetcher):
+    fetcher.fetch_forms([FIXTURE_ID])
+    fetcher.close()
+    assert fetcher.fetch([FIXTURE_ID], ["oewn-00000005-n"])
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+
+import pytest
+
+pytest.importorskip("gi")
+
+from wordbook.scheduler import (  # noqa: E402
+    BACKGROUND,
+    COMPLETION,
+    INTERACTIVE,
+    CancellationToken,
+    Scheduler,
+)
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler(workers=3)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_submit_returns_the_result(scheduler):
+    assert scheduler.submit(sum, (1, 2, 3)).result(TIMEOUT) == 6
+    assert scheduler.submit(max, 1, 2, priority=INTERACTIVE).result(TIMEOUT) == 2
+
+
+def test_exceptions_reach_the_future(scheduler):
+    future = scheduler.submit(int, "not a number")
+    with pytest.raises(ValueError):
+        future.result(TIMEOUT)
+
+
+def test_background_work_leaves_workers_free(scheduler):
+    release = threading.Event()
+    blocked = scheduler.submit(release.wait, priority=BACKGROUND)
+    waiting = scheduler.submit(lambda: "background", priority=BACKGROUND)
+    # The only background slot is taken, but interactive work still runs.
+    assert scheduler.submit(lambda: "search", priority=INTERACTIVE).result(TIMEOUT)
+    assert scheduler.submit(lambda: "complete", priority=COMPLETION).result(TIMEOUT)
+    assert not waiting.done()
+    release.set()
+    assert blocked.result(TIMEOUT)
+    assert waiting.result(TIMEOUT) == "background"
+
+
+def test_urgent_work_runs_first(scheduler):
+    release = threading.Event()
+    order = []
+    scheduler.submit(release.wait, priority=BACKGROUND)
+    futures = [
+        scheduler.submit(order.append, "background", priority=BACKGROUND),
+        scheduler.submit(order.append, "completion", priority=COMPLETION),
+    ]
+    futures[1].result(TIMEOUT)
+    release.set()
+    futures[0].result(TIMEOUT)
+    assert order == ["completion", "background"]
+
+
+def test_cancelled_tasks_do_not_start(scheduler):
+    release = threading.Event()
+    scheduler.submit(release.wait, priority=BACKGROUND)
+    token = CancellationToken()
+    future = scheduler.submit(lambda: "ran", priority=BACKGROUND, token=token)
+    token.cancel()
+    release.set()
+    scheduler.submit(release.wait, priority=BACKGROUND).result(TIMEOUT)
+    assert future.cancelled()
+    assert scheduler.stats()["classes"]["background"]["cancelled"] == 1
+
+
+def test_shutdown_cancels_queued_and_running_tasks():
+    scheduler = Scheduler(workers=3)
+    started = threading.Event()
+    running_token = CancellationToken()
+
+    def long_task(token):
+        started.set()
+        while not token():
+            scheduler.yield_to_urgent()
+            threading.Event().wait(0.01)
+        return "stopped"
+
+    running = scheduler.submit(
+        long_task, running_token, priority=BACKGROUND, token=running_token
+    )
+    started.wait(TIMEOUT)
+    queued = scheduler.submit(lambda: "ran", priority=BACKGROUND)
+    scheduler.shutdown()
+    assert queued.cancelled()
+    assert running.result(TIMEOUT) == "stopped"
+    assert scheduler.submit(lambda: "late").cancelled()
+
+
+def test_stats(scheduler):
+    scheduler.submit(len, "dog", priority=COMPLETION).result(TIMEOUT)
+    stats = scheduler.stats()
+    assert stats["workers"] == 3
+    assert stats["background_slots"] == 1
+    assert stats["classes"]["completion"]["completed"] == 1
+    assert stats["classes"]["completion"]["queued"] == 0
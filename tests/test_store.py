@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from wordbook.store import DefinitionStore
+
+DOG = {"term": "dog", "result": {"Noun": [{"name": "dog", "definition": "a dog"}]}}
+CAT = {"term": "cat", "result": {"Noun": [{"name": "cat", "definition": "a cat"}]}}
+
+
+def test_store_serves_nothing_until_built(tmp_path):
+    store = DefinitionStore(str(tmp_path / "definitions.db"))
+    assert store.get("dog") is None
+    assert not store.open("oewn:2021 1 1")
+
+
+def test_store_round_trip(tmp_path):
+    store = DefinitionStore(str(tmp_path / "definitions.db"))
+    assert store.build("oewn:2021 1 1", iter([("dog", DOG), ("cat", CAT)]))
+    assert store.get("dog") == DOG
+    assert store.get("cat") == CAT
+    assert store.get("axe") is None
+
+
+def test_store_builds_in_batches(tmp_path):
+    store = DefinitionStore(str(tmp_path / "definitions.db"))
+    entries = ((f"term {i}", {"term": f"term {i}"}) for i in range(1234))
+    assert store.build("oewn:2021 1 1", entries)
+    assert store.get("term 0") == {"term": "term 0"}
+    assert store.get("term 1233") == {"term": "term 1233"}
+
+
+def test_store_is_reopened_only_for_the_same_database(tmp_path):
+    path = str(tmp_path / "definitions.db")
+    DefinitionStore(path).build("oewn:2021 1 1", iter([("dog", DOG)]))
+    store = DefinitionStore(path)
+    assert store.open("oewn:2021 1 1")
+    assert store.get("dog") == DOG
+    # The database changed since the store was built, so it's not used.
+    assert not store.open("oewn:2021 2 1")
+    assert store.get("dog") is None
+
+
+def test_cancelled_build_leaves_no_usable_store(tmp_path):
+    path = str(tmp_path / "definitions.db")
+    store = DefinitionStore(path)
+    assert not store.build("oewn:2021 1 1", iter([("dog", DOG)]), lambda: True)
+    assert store.get("dog") is None
+    assert not DefinitionStore(path).open("oewn:2021 1 1")
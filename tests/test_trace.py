@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import pytest
+
+from wordbook import trace
+
+
+@pytest.fixture
+def tracing(monkeypatch):
+    """Enable tracing with empty statistics, and disable it afterwards."""
+    monkeypatch.setattr(trace, "_enabled", False)
+    monkeypatch.setattr(trace, "_samples", {})
+    monkeypatch.setattr(trace, "_recent", trace.deque(maxlen=100))
+    trace.enable()
+    return trace
+
+
+def test_disabled_spans_record_nothing(monkeypatch):
+    monkeypatch.setattr(trace, "_enabled", False)
+    monkeypatch.setattr(trace, "_samples", {})
+    with trace.span("lookup", "dog"):
+        trace.mark(True)
+    assert trace.stats()["stages"] == {}
+
+
+def test_spans_are_recorded(tracing):
+    for _i in range(3):
+        with tracing.span("lookup", "dog"):
+            pass
+    stats = tracing.stats()
+    lookup = stats["stages"]["lookup"]
+    assert lookup["count"] == 3
+    assert lookup["p50_ms"] <= lookup["p99_ms"] <= lookup["max_ms"]
+    assert sum(lookup["histogram"].values()) == 3
+    assert stats["recent"][-1]["term"] == "dog"
+
+
+def test_mark_tags_the_innermost_span(tracing):
+    with tracing.span("outer"):
+        with tracing.span("inner"):
+            tracing.mark(True)
+        tracing.mark(False)
+    stages = tracing.stats()["stages"]
+    assert (stages["inner"]["hits"], stages["inner"]["misses"]) == (1, 0)
+    assert (stages["outer"]["hits"], stages["outer"]["misses"]) == (0, 1)
+
+
+def test_mark_outside_a_span_is_ignored(tracing):
+    tracing.mark(True)
+    assert tracing.stats()["stages"] == {}
+
+
+def test_percentile():
+    durations = [float(i) for i in range(1, 101)]
+    assert trace._percentile(durations, 0.5) == 51
+    assert trace._percentile(durations, 0.99) == 100
+    assert trace._percentile([3.0], 0.9) == 3
@@ -8,36 +8,246 @@ base contains the shared code between the GTK+ 3 UI and other possible frontends
 base is a part of Wordbook.
 """
 
-import difflib
+import heapq
 import html
-import json
+import mmap
 import os
+import queue
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from functools import lru_cache
-from shutil import rmtree
+from itertools import groupby
+from shutil import rmtree, which
+
+from wordbook import trace, utils
+from wordbook.cache import DiskCache, LRUCache
+from wordbook.cdef import CustomDefinitions
+from wordbook.espeak import EspeakLibrary
+from wordbook.index import PrefixIndex, TrigramIndex
+from wordbook.morphology import Morphology
+from wordbook.relations import RelationFetcher
+from wordbook.scheduler import BACKGROUND, INTERACTIVE, Scheduler
+from wordbook.store import DefinitionStore
+
+WN_LEXICON = "oewn:2021"
+
+_POS_NAMES = {
+    "s": "adjective",
+    "n": "noun",
+    "v": "verb",
+    "r": "adverb",
+    "a": "adjective",
+    "t": "phrase",
+    "c": "conjunction",
+    "p": "adposition",
+    "x": "other",
+    "u": "unknown",
+}
+_POS_ORDER = (
+    "adjective",
+    "noun",
+    "verb",
+    "adverb",
+    "phrase",
+    "conjunction",
+    "adposition",
+    "other",
+    "unknown",
+)
+
+_PRON_CACHE = LRUCache("Pronunciation", maxsize=512)
+_PRON_STORE = DiskCache("Pronunciation", utils.PRON_CACHE_FILE)
+_DEF_STORE = DefinitionStore(os.path.join(utils.WN_DIR, "definitions.db"))
+_RELATIONS = {}  # A fetcher, with its own connection, for each set of lexicons.
+_reading = None  # The espeak-ng process started by read_term.
+_NOT_LOADED = object()
+_espeak = _NOT_LOADED  # The libespeak-ng binding, or None if it's unavailable.
+_espeak_lock = threading.Lock()
+
+
+class LookupCancelled(Exception):
+    """Raised when a newer search has made the running lookup obsolete."""
+
+
+def _scheduled(priority):
+    """
+    Wraps around a function allowing it to run on the shared scheduler with the
+    given priority and return a future object.
+    """
+
+    def decorator(func):
+        def wrap(*args, token=None, **kwargs):
+            return Scheduler.get().submit(
+                func, *args, priority=priority, token=token, **kwargs
+            )
+
+        return wrap
 
-import wn
-from wn import Wordnet
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def _wn():
+    """Import and set up wn on first use, as importing it slows down startup."""
+    import wn
 
-from wordbook import utils
+    wn.config.data_directory = os.path.join(utils.WN_DIR)
+    wn.config.allow_multithreading = True
+    return wn
 
-_POOL = ThreadPoolExecutor()
-wn.config.data_directory = os.path.join(utils.WN_DIR)
-wn.config.allow_multithreading = True
 
+def open_wordnet(lexicons=(WN_LEXICON,)):
+    """Open the WordNet database for the given lexicons."""
+    return WordnetSet(lexicons)
 
-def _threadpool(func):
+
+class WordnetSet:
     """
-    Wraps around a function allowing it to run in a separate thread and
-    return a future object.
+    The WordNet lexicons definitions are looked up in. When there are several,
+    each one is searched on a worker of its own and their results are merged.
     """
 
-    def wrap(*args, **kwargs):
-        return (_POOL).submit(func, *args, **kwargs)
+    def __init__(self, lexicons=(WN_LEXICON,)):
+        """Open every installed lexicon. Raises wn.Error if none can be opened."""
+        wn = _wn()
+        self._wordnets = {}
+        error = None
+        for lexicon in dict.fromkeys(lexicons):
+            try:
+                self._wordnets[lexicon] = wn.Wordnet(lexicon=lexicon)
+            except (wn.Error, wn.DatabaseError) as ex:
+                utils.log_warning(f"Couldn't open the {lexicon} lexicon: {ex}")
+                error = ex
+        if not self._wordnets:
+            raise error or wn.Error("No lexicon was given.")
+        self.lexicons = tuple(self._wordnets)
+        self.key = "+".join(self.lexicons)  # Identifies caches made from them.
+        self._morphology = None
+        self._morphology_lock = threading.Lock()
+        self._workers = {}
+        if len(self.lexicons) > 1:
+            self._workers = {
+                lexicon: ThreadPoolExecutor(1, thread_name_prefix=f"Lexicon {lexicon}")
+                for lexicon in self.lexicons
+            }
 
-    return wrap
+    def iter_definition(self, term, cancelled=None, parts=None):
+        """
+        Yield the term as found in WordNet, a part of speech and its synsets,
+        only in the given parts of speech if any.
+
+        With several lexicons, each synset is tagged with the lexicon it comes
+        from, and a part of speech is yielded once every lexicon is past it.
+        """
+        if not self._workers:
+            (wordnet,) = self._wordnets.values()
+            yield from iter_wn_definition(term, wordnet, cancelled, parts)
+            return
+
+        streams = []
+        for lexicon, wordnet in self._wordnets.items():
+            chunks = queue.SimpleQueue()
+            self._workers[lexicon].submit(
+                _stream_definition, term, wordnet, lexicon, cancelled, parts, chunks
+            )
+            streams.append(_read_stream(chunks))
+        yield from _merge_definitions(streams)
+
+    def morphology(self):
+        """
+        Return the Morphology of the lexicons, building it on first use.
+
+        The lemmas and irregular forms are read with a query each, along with
+        their parts of speech, so forms are only reduced to lemmas they inflect.
+        """
+        with self._morphology_lock:
+            if self._morphology is None:
+                fetcher = _relations(self.lexicons)
+                try:
+                    lemmas = fetcher.fetch_lemmas(self.lexicons)
+                    forms = fetcher.fetch_forms(self.lexicons)
+                except sqlite3.Error as ex:
+                    utils.log_warning(f"Couldn't read the lemmas and their forms: {ex}")
+                    # Without parts of speech, every rule applies to every lemma.
+                    wordlist = load_wordlist_snapshot(self.key) or self.words()
+                    lemmas = [(lemma, None) for lemma in wordlist]
+                    forms = []
+                self._morphology = Morphology(lemmas, forms)
+            return self._morphology
+
+    def words(self):
+        """Return the lemmas of every lexicon, without duplicates."""
+        return list(
+            dict.fromkeys(
+                word.lemma()
+                for wordnet in self._wordnets.values()
+                for word in wordnet.words()
+            )
+        )
+
+
+def _stream_definition(term, wordnet, lexicon, cancelled, parts, chunks):
+    """Put the definition of term in one lexicon on chunks, then None."""
+    try:
+        for match, pos, synset_dicts in iter_wn_definition(
+            term, wordnet, cancelled, parts
+        ):
+            for synset_dict in synset_dicts:
+                synset_dict["lexicon"] = lexicon
+            chunks.put((match, pos, synset_dicts))
+    except Exception as ex:  # Raised again by whoever reads the chunks.
+        chunks.put(ex)
+    chunks.put(None)
+
+
+def _read_stream(chunks):
+    """Yield the chunks put on a queue by _stream_definition."""
+    for chunk in iter(chunks.get, None):
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield chunk
+
+
+@_scheduled(BACKGROUND)
+def build_definition_store(wn_instance, wordlist, cancelled=None):
+    """Precompile the definition of every lemma into the definition store."""
+    if open_definition_store(wn_instance.key):
+        return True
+
+    def entries():
+        for term in dict.fromkeys(wordlist):
+            Scheduler.get().yield_to_urgent()
+            clean_def, failed = get_wn_definition(term, None, None, wn_instance)
+            if not failed:
+                result = clean_def["result"]
+                del result["word_col"], result["sen_col"]
+                yield term, {"term": clean_def["term"], "result": result}
+
+    utils.log_info("Building the definition store.")
+    start_time = time.perf_counter()
+    if _DEF_STORE.build(_database_key(wn_instance.key), entries(), cancelled):
+        utils.log_info(
+            f"Definition store built in {time.perf_counter() - start_time:.1f}s."
+        )
+        return True
+    utils.log_info("Definition store build interrupted.")
+    return False
+
+
+@_scheduled(BACKGROUND)
+def build_suggestion_index(wordlist):
+    """Build the index used to suggest corrections for misspelled terms."""
+    start_time = time.perf_counter()
+    suggestion_index = TrigramIndex(wordlist)
+    utils.log_debug(
+        f"Suggestion index built in {time.perf_counter() - start_time:.2f}s."
+    )
+    return suggestion_index
 
 
 def cleaner(search_term):
@@ -57,11 +267,32 @@ def fold_gen():
         os.makedirs(utils.CDEF_DIR)  # create Custom Definitions folder.
 
 
-def generate_definition(text, wordcol, sencol, wn_instance, cdef=True, accent="us"):
+def generate_definition(
+    text,
+    wordcol,
+    sencol,
+    wn_instance,
+    cdef=True,
+    accent="us",
+    cancelled=None,
+    on_chunk=None,
+):
     """Check if custom definition exists."""
-    if cdef and os.path.isfile(utils.CDEF_DIR + "/" + text.lower()):
-        return get_custom_def(text, wordcol, sencol, wn_instance, accent)
-    return get_data(text, wordcol, sencol, wn_instance, accent)
+    if cdef:
+        with trace.span("cdef lookup", text):
+            custom_def_dict = CustomDefinitions.get().lookup(text.lower())
+        if custom_def_dict is not None:
+            return get_custom_def(
+                text,
+                custom_def_dict,
+                wordcol,
+                sencol,
+                wn_instance,
+                accent,
+                cancelled,
+                on_chunk,
+            )
+    return get_data(text, wordcol, sencol, wn_instance, accent, cancelled, on_chunk)
 
 
 def get_cowfortune():
@@ -85,18 +316,34 @@ def get_cowfortune():
         return f"<tt>{fortune_out}</tt>"
 
 
-def get_custom_def(text, wordcol, sencol, wn_instance, accent="us"):
-    """Present custom definition when available."""
-    with open(utils.CDEF_DIR + "/" + text, "r") as def_file:
-        custom_def_dict = json.load(def_file)
+def get_custom_def(
+    text,
+    custom_def_dict,
+    wordcol,
+    sencol,
+    wn_instance,
+    accent="us",
+    cancelled=None,
+    on_chunk=None,
+):
+    """
+    Present a custom definition.
+
+    custom_def_dict is the definition as looked up, so it's presented even if
+    its file has been removed since.
+    """
     if "linkto" in custom_def_dict:
         return get_data(
-            custom_def_dict.get("linkto", text), wordcol, sencol, wn_instance, accent
+            custom_def_dict.get("linkto", text),
+            wordcol,
+            sencol,
+            wn_instance,
+            accent,
+            cancelled,
+            on_chunk,
         )
-    definition = custom_def_dict.get(
-        "out_string",
-        get_definition(text, wordcol, sencol, wn_instance)[0]["out_string"],
-    )
+    # get_definition never produces an out_string, so don't query WordNet for one.
+    definition = custom_def_dict.get("out_string")
     re_list = {
         "<i>($WORDCOL)</i>": wordcol,
         "<i>($SENCOL)</i>": sencol,
@@ -109,9 +356,8 @@ def get_custom_def(text, wordcol, sencol, wn_instance, accent="us"):
         for i, j in re_list.items():
             definition = definition.replace(i, j)
     term = custom_def_dict.get("term", text)
-    pronunciation = (
-        custom_def_dict.get("pronunciation", get_pronunciation(term, accent))
-        or "Is espeak-ng installed?"
+    pronunciation = custom_def_dict.get("pronunciation") or get_pronunciation(
+        term, accent
     )
     final_data = {
         "term": term,
@@ -121,17 +367,22 @@ def get_custom_def(text, wordcol, sencol, wn_instance, accent="us"):
     return final_data
 
 
-def get_data(term, word_col, sen_col, wn_instance, accent="us"):
+def get_data(
+    term, word_col, sen_col, wn_instance, accent="us", cancelled=None, on_chunk=None
+):
     """Obtain the data to be processed and presented."""
-    definition = get_definition(term, word_col, sen_col, wn_instance)
+    definition = get_definition(
+        term, word_col, sen_col, wn_instance, cancelled, on_chunk
+    )
     clean_def = definition[0]
+    if cancelled is not None and cancelled():
+        raise LookupCancelled
     pron = get_pronunciation(clean_def["term"] or term, accent)
-    if not pron or pron == "" or pron.isspace():
-        final_pron = "Is espeak-ng installed?"
-    else:
-        final_pron = pron
+    # None tells the frontend there is no pronunciation, e.g. without espeak-ng.
+    final_pron = pron if pron and not pron.isspace() else None
     final_data = {
         "term": clean_def["term"],
+        "base_forms": clean_def.get("base_forms"),
         "pronunciation": final_pron,
         "result": clean_def["result"],
         "out_string": clean_def["out_string"],
@@ -139,86 +390,111 @@ def get_data(term, word_col, sen_col, wn_instance, accent="us"):
     return final_data
 
 
-def get_definition(term, word_col, sen_col, wn_instance):
-    """Get the definition from python-wn and process it."""
-    result_dict = None
-    synsets = wn_instance.synsets(term)  # Get relevant synsets.
+def get_definition(
+    term, word_col, sen_col, wn_instance, cancelled=None, on_chunk=None
+):
+    """
+    Get the definition, from the definition store if possible.
+
+    An inflected term is looked up as every lemma it may be a form of, as
+    "axes" is both "axis" and "ax", and those are then given as "base_forms".
+    Each lemma is only looked up in the parts of speech the term inflects, so
+    "took" is the verb "take" but not the noun.
+    If given, on_chunk(term, pos, result_dict) is called as soon as each part of
+    speech is ready.
+    """
+    with trace.span("get_definition", term):
+        base_forms = _group_base_forms(wn_instance.morphology().base_forms(term))
+        stored = [_DEF_STORE.get(base_form) for base_form in base_forms]
+        trace.mark(None not in stored)
+        streams = [
+            wn_instance.iter_definition(base_form, cancelled, parts)
+            if definition is None
+            else _iter_stored_definition(definition, parts)
+            for (base_form, parts), definition in zip(base_forms.items(), stored)
+        ]
+        chunks = streams[0] if len(streams) == 1 else _merge_definitions(streams)
+        with trace.span("wordnet", term) if None in stored else nullcontext():
+            clean_def, failed = _collect_definition(
+                term, chunks, word_col, sen_col, on_chunk
+            )
+        if failed:
+            return (clean_def, failed)
+        # Tells the reader when an inflected form was looked up as its lemmas.
+        base_forms = list(base_forms)
+        clean_def["base_forms"] = base_forms if base_forms != [term] else None
+        return (clean_def, False)
+
+
+def _group_base_forms(base_forms):
+    """
+    Group (lemma, pos) base forms by lemma, each with the names of its parts of
+    speech, or None for every part of speech.
+    """
+    grouped = {}
+    for lemma, pos in base_forms:
+        if pos is None:
+            grouped[lemma] = None
+        elif grouped.setdefault(lemma, set()) is not None:
+            grouped[lemma].add(_POS_NAMES[pos])
+    return grouped
 
-    if synsets:
-        # Synsets have 'parts of speech'. We need their real names.
-        # We also need to track their values across synsets to an extent.
-        pos = None
-        actual_pos = {
-            "s": "adjective",
-            "n": "noun",
-            "v": "verb",
-            "r": "adverb",
-            "a": "adjective",
-            "t": "phrase",
-            "c": "conjunction",
-            "p": "adposition",
-            "x": "other",
-            "u": "unknown",
-        }
 
-        result_dict = {
-            "adjective": [],
-            "noun": [],
-            "verb": [],
-            "adverb": [],
-            "phrase": [],
-            "conjunction": [],
-            "adposition": [],
-            "other": [],
-            "unknown": [],
-            "word_col": word_col,
-            "sen_col": sen_col,
-        }
-        first_match = None
-        for synset in synsets:
-            # Try to organize based on parts of speech.
-            pos = actual_pos[synset.pos]  # If this fails, nothing beyond it is useful.
-
-            # We need the term as is found in the WordNet database.
-            lemma_names = synset.lemmas()
-            diff_match = difflib.get_close_matches(term, lemma_names)
-            synset_name = diff_match[0].strip() if diff_match else lemma_names[0]
-
-            # If suitable term isn't found, return the term entered.
-            if first_match is None or first_match == "":
-                first_match = synset_name
-
-            syn = []  # Synonyms
-            ant = []  # Antonyms
-            for lemma in synset.lemmas():
-                syn_name = lemma.replace("_", " ").strip()
-                if not syn_name == first_match:
-                    syn.append(syn_name)
-            for sense in synset.senses():
-                for ant_sense in sense.get_related("antonym"):
-                    ant_name = ant_sense.word().lemma()
-                    ant.append(ant_name)
-
-            sims = []  # WordNet's "Similar to"
-            for sim_synset in synset.get_related("similar"):
-                sims.extend(sim_synset.lemmas())
-
-            also_sees = []  # WorNet's "Also See"
-            for also_synset in synset.get_related("also"):
-                also_sees.extend(also_synset.lemmas())
-
-            synset_dict = {
-                "name": synset_name,
-                "definition": synset.definition(),
-                "examples": synset.examples(),
-                "syn": syn,
-                "ant": ant,
-                "sim": sims,
-                "also_sees": also_sees,
-            }
+def _iter_stored_definition(definition, parts=None):
+    """
+    Yield a definition from the store the way iter_wn_definition does, only in
+    the given parts of speech if any.
+    """
+    for pos in _POS_ORDER:
+        if definition["result"].get(pos) and (parts is None or pos in parts):
+            yield definition["term"], pos, definition["result"][pos]
+
+
+def _merge_definitions(streams):
+    """
+    Merge the definitions of several lemmas, one part of speech at a time.
+
+    Each stream yields its parts of speech in order, so one is complete once
+    every stream has gone past it. A synset found through more than one lemma
+    is listed once.
+    """
+    chunks = heapq.merge(*streams, key=lambda chunk: _POS_ORDER.index(chunk[1]))
+    first_match = None
+    for pos, pos_chunks in groupby(chunks, key=lambda chunk: chunk[1]):
+        synset_dicts = {}
+        for match, _pos, dicts in pos_chunks:
+            first_match = first_match or match
+            for synset_dict in dicts:
+                key = (synset_dict.get("lexicon"), synset_dict["id"])
+                synset_dicts.setdefault(key, synset_dict)
+        yield first_match, pos, list(synset_dicts.values())
+
+
+def get_wn_definition(
+    term, word_col, sen_col, wn_instance, cancelled=None, on_chunk=None
+):
+    """Get the definition from python-wn and process it."""
+    return _collect_definition(
+        term,
+        wn_instance.iter_definition(term, cancelled),
+        word_col,
+        sen_col,
+        on_chunk,
+    )
 
-            # Get the definition for each synset.
-            result_dict[pos].append(synset_dict)
+
+def _collect_definition(term, chunks, word_col, sen_col, on_chunk=None):
+    """Gather the parts of speech yielded by chunks into a definition."""
+    result_dict = None
+    first_match = None
+    for first_match, pos, synset_dicts in chunks:
+        if result_dict is None:
+            result_dict = {pos_name: [] for pos_name in _POS_ORDER}
+            result_dict["word_col"] = word_col
+            result_dict["sen_col"] = sen_col
+        result_dict[pos] = synset_dicts
+        if on_chunk is not None:
+            on_chunk(first_match, pos, result_dict)
 
     if result_dict is None:
         clean_def = {
@@ -235,6 +511,170 @@ def get_definition(term, word_col, sen_col, wn_instance):
     return (clean_def, False)
 
 
+def iter_wn_definition(term, wn_instance, cancelled=None, parts=None):
+    """
+    Yield the term as found in WordNet, a part of speech and its synsets, only
+    in the given parts of speech if any.
+
+    The details of the synsets are fetched one part of speech at a time, so
+    the first can be shown before the others are read.
+    """
+    synsets = wn_instance.synsets(term)  # Get relevant synsets.
+    if parts is not None:
+        synsets = [synset for synset in synsets if _POS_NAMES[synset.pos] in parts]
+    if not synsets:
+        return
+
+    # Synsets have 'parts of speech'. We need their real names.
+    # If this fails, nothing beyond it is useful.
+    grouped = {}
+    for synset in synsets:
+        grouped.setdefault(_POS_NAMES[synset.pos], []).append(synset)
+
+    term_key = _head_word_key(term)
+    first_match = None
+    for pos in _POS_ORDER:
+        pos_synsets = grouped.get(pos)
+        if not pos_synsets:
+            continue
+        if first_match is None:
+            # We need the term as is found in the WordNet database, which is
+            # settled by the first synset found, so it comes with the first fetch.
+            extra = [] if pos_synsets[0] is synsets[0] else [synsets[0]]
+            pos_details = _get_synset_details(
+                wn_instance, extra + pos_synsets, cancelled
+            )
+            for details in pos_details:
+                if details["lemmas"]:
+                    first_match = _resolve_head_word(term, term_key, details["lemmas"])
+                    break
+            else:
+                first_match = term
+            pos_details = pos_details[len(extra) :]
+        else:
+            pos_details = _get_synset_details(wn_instance, pos_synsets, cancelled)
+
+        # Each part of speech is complete once yielded, so it can be shown early.
+        synset_dicts = []
+        for details in pos_details:
+            if cancelled is not None and cancelled():
+                raise LookupCancelled
+            synset_dicts.append(_get_synset_dict(details, term, term_key, first_match))
+        yield first_match, pos, synset_dicts
+
+
+def _get_synset_details(wn_instance, synsets, cancelled=None):
+    """
+    Fetch the lemmas, definition, examples and relations of each synset.
+    Raises LookupCancelled as soon as cancelled() is true.
+    """
+    if cancelled is not None and cancelled():
+        raise LookupCancelled
+    lexicons = [f"{lexicon.id}:{lexicon.version}" for lexicon in wn_instance.lexicons()]
+    try:
+        fetched = _relations(lexicons).fetch(
+            lexicons, [synset.id for synset in synsets], cancelled
+        )
+    except sqlite3.Error as ex:
+        utils.log_warning(f"Couldn't query the WordNet database directly: {ex}")
+        fetched = {}
+    if fetched is None:
+        raise LookupCancelled
+    details = []
+    for synset in synsets:
+        if synset.id not in fetched:
+            # Read through wn one query at a time, so check between synsets.
+            if cancelled is not None and cancelled():
+                raise LookupCancelled
+            details.append(_read_synset_details(synset))
+        else:
+            details.append(fetched[synset.id])
+    return details
+
+
+def _relations(lexicons):
+    """Return the fetcher used for the given lexicons."""
+    key = tuple(lexicons)
+    fetcher = _RELATIONS.get(key)
+    if fetcher is None:
+        fetcher = _RELATIONS.setdefault(
+            key, RelationFetcher(os.path.join(utils.WN_DIR, "wn.db"))
+        )
+    return fetcher
+
+
+def _read_synset_details(synset):
+    """Read the details of a synset through wn, one query at a time."""
+    ant = []  # Antonyms
+    for sense in synset.senses():
+        for ant_sense in sense.get_related("antonym"):
+            ant.append(ant_sense.word().lemma())
+
+    sims = []  # WordNet's "Similar to"
+    for sim_synset in synset.get_related("similar"):
+        sims.extend(sim_synset.lemmas())
+
+    also_sees = []  # WorNet's "Also See"
+    for also_synset in synset.get_related("also"):
+        also_sees.extend(also_synset.lemmas())
+
+    return {
+        "id": synset.id,
+        "lemmas": synset.lemmas(),
+        "definition": synset.definition(),
+        "examples": synset.examples(),
+        "ant": ant,
+        "sim": sims,
+        "also": also_sees,
+    }
+
+
+def _get_synset_dict(details, term, term_key, first_match):
+    """Collect everything shown for a single synset."""
+    lemma_names = details["lemmas"]
+    synset_name = _resolve_head_word(term, term_key, lemma_names)
+
+    syn = []  # Synonyms
+    for lemma in lemma_names:
+        syn_name = lemma.replace("_", " ").strip()
+        if not syn_name == first_match:
+            syn.append(syn_name)
+
+    return {
+        "id": details["id"],
+        "name": synset_name,
+        "definition": details["definition"],
+        "examples": details["examples"],
+        "syn": syn,
+        "ant": details["ant"],
+        "sim": details["sim"],
+        "also_sees": details["also"],
+    }
+
+
+@lru_cache(maxsize=65536)
+def _head_word_key(word):
+    """Normalize a word for head-word matching."""
+    return word.replace("_", " ").replace("-", " ").strip()
+
+
+def _resolve_head_word(term, term_key, lemma_names):
+    """Find the lemma of a synset that the search term refers to."""
+    if term in lemma_names:
+        return term
+    # Only fall back to fuzzy matching when normalization can't settle it.
+    # Case is kept in the key, as difflib picks other lemmas over case variants.
+    candidates = [lemma for lemma in lemma_names if _head_word_key(lemma) == term_key]
+    if len(candidates) == 1:
+        return candidates[0]
+    import difflib  # Rarely needed, so it's only imported on first use.
+
+    diff_match = difflib.get_close_matches(term, candidates or lemma_names)
+    if diff_match:
+        return diff_match[0].strip()
+    return (candidates or lemma_names)[0]
+
+
 def get_fortune(mono=True):
     """Present fortune easter egg."""
     try:
@@ -252,9 +692,56 @@ def get_fortune(mono=True):
     return fortune_out
 
 
-@lru_cache(maxsize=None)
 def get_pronunciation(term, accent="us"):
-    """Get the pronunciation from espeak and process it."""
+    """Get the pronunciation, from the caches if possible."""
+    return get_pronunciations([term], accent)[0]
+
+
+def get_pronunciations(terms, accent="us"):
+    """Get the pronunciations of many terms, generating the missing ones at once."""
+    with trace.span("get_pronunciation", terms[0] if len(terms) == 1 else None):
+        prons = [_PRON_CACHE.get((term, accent)) for term in terms]
+        missing = [i for i, pron in enumerate(prons) if pron is None]
+        trace.mark(not missing)
+        if missing:
+            identity = _espeak_identity()
+            store_keys = {i: f"{identity}\0{accent}\0{terms[i]}" for i in missing}
+            for i in missing:
+                prons[i] = _PRON_STORE.get(store_keys[i])
+            generate = [i for i in missing if prons[i] is None]
+            trace.mark(not generate)
+            if generate:
+                with trace.span("espeak"):
+                    generated = _espeak_pronunciations(
+                        [terms[i] for i in generate], accent
+                    )
+                for i, pron in zip(generate, generated):
+                    prons[i] = pron
+                    if pron is not None:
+                        _PRON_STORE.put(store_keys[i], pron)
+            for i in missing:
+                if prons[i] is not None:
+                    _PRON_CACHE.put((terms[i], accent), prons[i])
+        utils.log_debug(f"{_PRON_CACHE.stats()}; {_PRON_STORE.stats()}")
+        return prons
+
+
+def _espeak_pronunciations(terms, accent="us"):
+    """Get the pronunciations from espeak and process them."""
+    library = _espeak_library()
+    if library is not None:
+        try:
+            outputs = library.ipa_many(terms, accent)
+            return [f" /{output}/" for output in outputs]
+        except OSError as ex:
+            utils.log_warning("libespeak-ng failed, using espeak-ng: " + str(ex))
+    elif _espeak_identity() == "none":
+        return [None] * len(terms)  # Neither is installed, as logged once.
+    return [_espeak_pronunciation(term, accent) for term in terms]
+
+
+def _espeak_pronunciation(term, accent="us"):
+    """Get the pronunciation from an espeak process and process it."""
     try:
         process_pron = subprocess.Popen(
             ["espeak-ng", "-v", f"en-{accent}", "--ipa", "-q", term],
@@ -270,6 +757,42 @@ def get_pronunciation(term, accent="us"):
     return clean_output
 
 
+def _espeak_library():
+    """Load libespeak-ng once, or return None if it isn't available."""
+    global _espeak
+    # Held until the first caller is done, so the library is loaded only once.
+    with _espeak_lock:
+        if _espeak is _NOT_LOADED:
+            error = None
+            try:
+                _espeak = EspeakLibrary()
+            except OSError as ex:
+                _espeak = None
+                error = ex
+            # Logged out of the except block, which would add a traceback.
+            if error is not None and which("espeak-ng") is None:
+                utils.log_warning(
+                    "espeak-ng isn't installed, so there are no pronunciations."
+                )
+            elif error is not None:
+                utils.log_info(f"libespeak-ng unavailable, using espeak-ng: {error}")
+        return _espeak
+
+
+@lru_cache(maxsize=None)
+def _espeak_identity():
+    """Identify the espeak-ng build in use without running it."""
+    library = _espeak_library()
+    if library is not None:
+        return f"lib:{library.version}"
+    path = which("espeak-ng")
+    if path is None:
+        return "none"
+    path = os.path.realpath(path)
+    path_stat = os.stat(path)
+    return f"{path}:{path_stat.st_mtime_ns}:{path_stat.st_size}"
+
+
 def get_version_info(version):
     """Present clear version info."""
     print("Wordbook - " + version)
@@ -286,24 +809,90 @@ def get_version_info(version):
         print("You're missing a few dependencies. (espeak-ng)\n" + str(ex))
 
 
-@_threadpool
-def get_wn_file(reloader):
+@_scheduled(INTERACTIVE)
+def get_wn_file(reloader, lexicons=(WN_LEXICON,)):
     """Get the WordNet wordlist according to WordNet version."""
+    start_time = time.perf_counter()
     utils.log_info("Initializing WordNet.")
+    wn = _wn()
     try:
-        wn_instance = Wordnet(lexicon="oewn:2021")
+        wn_instance = open_wordnet(lexicons)
     except (wn.Error, wn.DatabaseError):
         utils.log_info(
             "The WordNet database is either corrupted or is of an older version."
         )
         return reloader()
+    utils.startup_phase("wordnet open", start_time)
     utils.log_info("Fetching WordNet, wordlist.")
-    wn_file = [w.lemma() for w in wn_instance.words()]
+    list_time = time.perf_counter()
+    wn_file = load_wordlist_snapshot(wn_instance.key)
+    if wn_file is None:
+        utils.log_info("Wordlist snapshot missing or stale, rebuilding.")
+        wn_file = wn_instance.words()
+        save_wordlist_snapshot(wn_instance.key, wn_file)
+    utils.log_info("Building completion index.")
+    wn_index = PrefixIndex(wn_file)
+    utils.startup_phase("word-list build", list_time)
+    morphology_time = time.perf_counter()
+    wn_instance.morphology()
+    utils.startup_phase("morphology build", morphology_time)
+    if not open_definition_store(wn_instance.key):
+        utils.log_info("Definition store missing or stale, using WordNet directly.")
     utils.log_info("WordNet is ready.")
-    return {"instance": wn_instance, "list": wn_file}
+    utils.log_debug(f"WordNet took {time.perf_counter() - start_time:.3f}s to load.")
+    return {"instance": wn_instance, "list": wn_file, "index": wn_index}
 
 
-def reactor(text, dark_font, wn_instance, cdef, accent="us"):
+def _wordlist_snapshot_path(lexicon):
+    """Return the path of the wordlist snapshot for a lexicon."""
+    return os.path.join(utils.WN_DIR, f"{lexicon.replace(':', '-')}.lemmas")
+
+
+def _database_key(lexicon):
+    """Return the key identifying the WordNet database a cache was made from."""
+    db_stat = os.stat(os.path.join(utils.WN_DIR, "wn.db"))
+    return f"{lexicon} {db_stat.st_mtime_ns} {db_stat.st_size}"
+
+
+def load_wordlist_snapshot(lexicon):
+    """Load the wordlist snapshot if it matches the current WordNet database."""
+    try:
+        key = _database_key(lexicon).encode()
+        with open(_wordlist_snapshot_path(lexicon), "rb") as snapshot_file:
+            with mmap.mmap(
+                snapshot_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as snapshot:
+                header_end = snapshot.find(b"\n")
+                if header_end == -1 or snapshot[:header_end] != key:
+                    return None
+                return snapshot[header_end + 1 :].decode().split("\n")
+    except (OSError, ValueError):
+        return None
+
+
+def save_wordlist_snapshot(lexicon, wordlist):
+    """Save the wordlist next to the WordNet database for faster startups."""
+    path = _wordlist_snapshot_path(lexicon)
+    try:
+        with open(path + ".tmp", "w") as snapshot_file:
+            snapshot_file.write(_database_key(lexicon) + "\n")
+            snapshot_file.write("\n".join(wordlist))
+        os.replace(path + ".tmp", path)
+    except OSError:
+        utils.log_warning("Couldn't save the wordlist snapshot.")
+
+
+def open_definition_store(lexicon=WN_LEXICON):
+    """Use the definition store for lookups if it matches the WordNet database."""
+    try:
+        return _DEF_STORE.open(_database_key(lexicon))
+    except OSError:
+        return False
+
+
+def reactor(
+    text, dark_font, wn_instance, cdef, accent="us", cancelled=None, on_chunk=None
+):
     """Return appropriate definitions."""
     if dark_font:
         sencol = "cyan"  # Color of sentences in Dark mode
@@ -327,22 +916,39 @@ def reactor(text, dark_font, wn_instance, cdef, accent="us"):
     if text in ("crash now", "close now"):
         return sys.exit()
     if text and not text.isspace():
-        return generate_definition(
-            text, wordcol, sencol, wn_instance, cdef=cdef, accent=accent
-        )
+        with trace.span("reactor", text):
+            return generate_definition(
+                text,
+                wordcol,
+                sencol,
+                wn_instance,
+                cdef=cdef,
+                accent=accent,
+                cancelled=cancelled,
+                on_chunk=on_chunk,
+            )
     return None
 
 
 def read_term(text, speed=120, accent="us"):
-    """Say text loudly."""
+    """Say text loudly, cutting off whatever was being said before."""
+    global _reading
+    stop_reading()
     with open(os.devnull, "w") as null_maker:
-        subprocess.Popen(
+        _reading = subprocess.Popen(
             ["espeak-ng", "-s", speed, "-v", f"en-{accent}", text],
             stdout=null_maker,
             stderr=subprocess.STDOUT,
         )
 
 
+def stop_reading():
+    """Stop saying the term read out by read_term, if it's still going."""
+    reading = _reading
+    if reading is not None and reading.poll() is None:
+        reading.terminate()
+
+
 class WordnetDownloader:
     @staticmethod
     def check_status():
@@ -352,13 +958,66 @@ class WordnetDownloader:
         return os.path.isfile(os.path.join(utils.WN_DIR, "wn.db"))
 
     @staticmethod
-    def download(progress_handler=None):
-        """Download the Wordnet database."""
+    def download(progress_handler=None, archive=None, sha256=None):
+        """
+        Install the Wordnet database from a local archive, or download it first.
+
+        An interrupted download is resumed, and the archive is verified before
+        it's imported. A downloaded archive is kept, so rebuilding the database
+        doesn't need the network again.
+        """
+        # Only needed when installing, and requests is slow to import.
+        from wordbook import download
+
+        wn = _wn()
+        handler = progress_handler or wn.util.ProgressHandler
+        # Older versions left partial downloads of wn here.
         if os.path.isdir(os.path.join(utils.WN_DIR, "downloads")):
             rmtree(os.path.join(utils.WN_DIR, "downloads"))
-        wn.download("oewn:2021", progress_handler=progress_handler)
+        os.makedirs(utils.WN_DIR, exist_ok=True)
+
+        downloaded = archive is None
+        progress = handler(message="Download", unit=" bytes")
+        try:
+            if downloaded:
+                archive = download.fetch(
+                    wn.config.get_project_info(WN_LEXICON)["resource_urls"],
+                    os.path.join(utils.WN_DIR, "archives"),
+                    progress,
+                )
+            download.verify(archive, sha256, progress)
+        except download.VerificationError:
+            if downloaded:
+                os.remove(archive)  # Damaged, so the next attempt starts afresh.
+            raise
+        finally:
+            progress.close()
+        wn.add(archive, progress_handler=handler)
+
+    @staticmethod
+    def add(path, progress_handler=None):
+        """Install the lexicons of a local WN-LMF file and return their names."""
+        installed = WordnetDownloader.installed_lexicons()
+        _wn().add(path, progress_handler=progress_handler)
+        return [
+            lexicon
+            for lexicon in WordnetDownloader.installed_lexicons()
+            if lexicon not in installed
+        ]
+
+    @staticmethod
+    def installed_lexicons():
+        """Return the installed lexicons, as id:version strings."""
+        return [f"{lexicon.id}:{lexicon.version}" for lexicon in _wn().lexicons()]
 
     @staticmethod
     def delete_db():
         """Delete the Wordnet database."""
+        for fetcher in list(_RELATIONS.values()):
+            fetcher.close()
         os.remove(os.path.join(utils.WN_DIR, "wn.db"))
+        if os.path.isfile(os.path.join(utils.WN_DIR, "definitions.db")):
+            os.remove(os.path.join(utils.WN_DIR, "definitions.db"))
+        for name in os.listdir(utils.WN_DIR):
+            if name.endswith(".lemmas"):
+                os.remove(os.path.join(utils.WN_DIR, name))
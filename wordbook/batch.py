@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+batch contains the headless batch lookup mode of Wordbook.
+
+batch is a part of Wordbook.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from wordbook import base, utils
+from wordbook.settings import Settings
+
+CHUNK_SIZE = 64
+
+_wn_instance = None
+
+
+def _init_worker():
+    """Open a WordNet instance for this worker process."""
+    global _wn_instance
+    _wn_instance = base.open_wordnet(Settings.get().lexicons)
+    base.open_definition_store(_wn_instance.key)
+
+
+def _look_up_chunk(terms, accent):
+    """Look up a chunk of terms and return their results."""
+    results = []
+    for term in terms:
+        text = base.cleaner(term)
+        data = None
+        if text and not text.isspace():
+            data = base.get_data(text, "green", "blue", _wn_instance, accent)
+        results.append(format_result(term, data))
+    return results
+
+
+def format_result(query, data):
+    """Turn the data returned by get_data into a JSON-friendly dict."""
+    if data is None or data["result"] is None:
+        return {"query": query, "found": False}
+    result = {
+        pos: synsets
+        for pos, synsets in data["result"].items()
+        if pos not in ("word_col", "sen_col") and synsets
+    }
+    return {
+        "query": query,
+        "found": True,
+        "term": data["term"],
+        "base_forms": data.get("base_forms"),
+        "pronunciation": (data["pronunciation"] or "").strip() or None,
+        "result": result,
+    }
+
+
+def _read_terms(file):
+    """Yield the non-empty lines of the input, one term each."""
+    for line in file:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def resolve(terms, workers, accent="us"):
+    """Look terms up on worker processes and yield their results in order."""
+    terms = iter(terms)
+    pending = deque()
+    # Workers are spawned rather than forked: the caller may already have SQLite
+    # connections open, and those must not be carried into a child process.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as pool:
+        while True:
+            chunk = list(islice(terms, CHUNK_SIZE))
+            if chunk:
+                pending.append(pool.submit(_look_up_chunk, chunk, accent))
+            # Keep a bounded number of chunks in flight so memory stays flat.
+            while pending and (not chunk or len(pending) >= workers * 4):
+                yield from pending.popleft().result()
+            if not chunk:
+                break
+
+
+def run(file, output, workers, accent="us"):
+    """Resolve every term of file in parallel and write the results in order."""
+    count = 0
+    start_time = time.perf_counter()
+    for result in resolve(_read_terms(file), workers, accent):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        count += 1
+    output.flush()
+    elapsed = time.perf_counter() - start_time
+    utils.log_info(
+        f"Looked up {count} terms in {elapsed:.2f}s "
+        f"({count / elapsed if elapsed else 0:.1f} terms/sec)."
+    )
+    return count
+
+
+def main(argv):
+    """Run the batch lookup mode from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="wordbook", description="Look up a list of terms without the GUI."
+    )
+    parser.add_argument(
+        "--batch",
+        required=True,
+        metavar="FILE",
+        help="file with one term per line, or - for standard input",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes",
+    )
+    parser.add_argument(
+        "--accent", choices=("us", "gb"), default="us", help="pronunciations accent"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="report progress and throughput"
+    )
+    args = parser.parse_args(argv)
+
+    utils.log_init(args.verbose)
+    if not base.WordnetDownloader.check_status():
+        utils.log_error("WordNet hasn't been downloaded yet. Run Wordbook once first.")
+        return 1
+
+    workers = max(1, args.workers)
+    if args.batch == "-":
+        run(sys.stdin, sys.stdout, workers, args.accent)
+    else:
+        with open(args.batch, "r") as file:
+            run(file, sys.stdout, workers, args.accent)
+    return 0
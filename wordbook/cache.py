@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+cache contains the bounded in-memory and on-disk caches used by Wordbook.
+
+cache is a part of Wordbook.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """A thread-safe least-recently-used cache with a fixed number of entries."""
+
+    def __init__(self, name, maxsize=256):
+        """Initialize the cache."""
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if it isn't cached."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        """Return a short description of the cache's hit rate."""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return (
+            f"{self.name} cache: {self.hits} hits, {self.misses} misses "
+            f"({rate:.1f}%), {len(self._data)}/{self.maxsize} entries"
+        )
+
+
+class DiskCache:
+    """
+    A string key-value store in SQLite, evicting least recently used entries.
+
+    The access times of hits are kept in memory and written in batches, so a
+    hit is a single read. Those of the last few hits are lost on exit, which
+    only makes eviction a little less exact.
+    """
+
+    def __init__(self, name, path, max_entries=20000, touch_batch=64):
+        """Initialize the cache. The database is opened on first use."""
+        self.name = name
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._count = 0
+        self._touched = {}  # Access times of hits not yet written.
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Open the database, creating the table if needed."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)"
+            )
+            self._count = self._connection.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()[0]
+        return self._connection
+
+    def get(self, key):
+        """Return the cached value for key, or None if it isn't cached."""
+        with self._lock:
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._touched[key] = time.time()
+                if len(self._touched) >= self.touch_batch:
+                    with connection:
+                        self._write_touched(connection)
+            except sqlite3.Error:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        """Store a value, evicting the oldest tenth of entries when full."""
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    # Eviction goes by access time, so those must be up to date.
+                    self._write_touched(connection)
+                    self._touched.pop(key, None)
+                    cursor = connection.execute(
+                        "UPDATE entries SET value = ?, used = ? WHERE key = ?",
+                        (value, time.time(), key),
+                    )
+                    if not cursor.rowcount:
+                        # Only a new key adds to the count, not a replaced one.
+                        connection.execute(
+                            "INSERT INTO entries VALUES (?, ?, ?)",
+                            (key, value, time.time()),
+                        )
+                        self._count += 1
+                    if self._count > self.max_entries:
+                        connection.execute(
+                            "DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+                            "ORDER BY used LIMIT ?)",
+                            (self._count - self.max_entries * 9 // 10,),
+                        )
+                        self._count = connection.execute(
+                            "SELECT COUNT(*) FROM entries"
+                        ).fetchone()[0]
+            except sqlite3.Error:
+                pass
+
+    def _write_touched(self, connection):
+        """Write the pending access times. Call with the lock held."""
+        if self._touched:
+            connection.executemany(
+                "UPDATE entries SET used = ? WHERE key = ?",
+                ((used, key) for key, used in self._touched.items()),
+            )
+            self._touched.clear()
+
+    def stats(self):
+        """Return a short description of the cache's hit rate."""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return (
+            f"{self.name} disk cache: {self.hits} hits, {self.misses} misses "
+            f"({rate:.1f}%), {self._count}/{self.max_entries} entries"
+        )
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+cdef contains the in-memory registry of custom definitions.
+
+cdef is a part of Wordbook.
+"""
+
+import json
+import os
+import threading
+
+from gi.repository import Gio, GLib
+
+from wordbook import utils
+from wordbook.index import PrefixIndex, TrigramIndex
+
+# How long a burst of changes has to settle before the names are reindexed, in ms.
+REINDEX_DELAY = 250
+
+
+class CustomDefinitions:
+    """Keeps the parsed custom definitions and an index of their names."""
+
+    instance = None
+
+    def __init__(self):
+        """Initialize the registry. Definitions are loaded on first use."""
+        self.generation = 0
+        self._entries = None
+        self._index = PrefixIndex()
+        self._suggestion_index = TrigramIndex()
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._on_change = None
+        self._reindex_source = None
+
+    @staticmethod
+    def get():
+        """Return an instance of CustomDefinitions"""
+        if CustomDefinitions.instance is None:
+            CustomDefinitions.instance = CustomDefinitions()
+        return CustomDefinitions.instance
+
+    def complete(self, prefix, limit=10):
+        """Return up to `limit` custom definition names starting with prefix."""
+        self._ensure_loaded()
+        return self._index.complete(prefix, limit)
+
+    def lookup(self, name):
+        """Return the parsed custom definition for name, or None."""
+        self._ensure_loaded()
+        return self._entries.get(name)
+
+    def suggest(self, term, limit=5):
+        """Return up to `limit` custom definition names close to term."""
+        self._ensure_loaded()
+        return self._suggestion_index.suggest(term, limit)
+
+    def watch(self, on_change=None):
+        """
+        Follow changes to the custom definitions folder. Call from main thread.
+
+        If given, on_change() is called on the main thread after each change.
+        """
+        self._on_change = on_change
+        if self._monitor is None:
+            cdef_dir = Gio.File.new_for_path(utils.CDEF_DIR)
+            self._monitor = cdef_dir.monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+            self._monitor.connect("changed", self._on_changed)
+
+    def _ensure_loaded(self):
+        """Load every custom definition if that hasn't been done yet."""
+        with self._lock:
+            if self._entries is not None:
+                return
+            entries = {}
+            for name in os.listdir(utils.CDEF_DIR):
+                custom_def = self._load(name)
+                if custom_def is not None:
+                    entries[name] = custom_def
+            self._entries = entries
+            self._index = PrefixIndex(entries)
+            self._suggestion_index = TrigramIndex(entries)
+            utils.log_info(f"Loaded {len(entries)} custom definitions.")
+
+    @staticmethod
+    def _load(name):
+        """Read and parse a single custom definition file."""
+        try:
+            with open(os.path.join(utils.CDEF_DIR, name), "r") as def_file:
+                return json.load(def_file)
+        except (OSError, ValueError):
+            utils.log_warning(f"Couldn't read custom definition: {name}")
+            return None
+
+    def _on_changed(self, _monitor, file, other_file, event_type):
+        """Update the registry when a custom definition changes."""
+        removed = []
+        updated = []
+        if event_type in (
+            Gio.FileMonitorEvent.CREATED,
+            Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+            Gio.FileMonitorEvent.MOVED_IN,
+        ):
+            updated.append(file.get_basename())
+        elif event_type in (
+            Gio.FileMonitorEvent.DELETED,
+            Gio.FileMonitorEvent.MOVED_OUT,
+        ):
+            removed.append(file.get_basename())
+        elif event_type == Gio.FileMonitorEvent.RENAMED:
+            removed.append(file.get_basename())
+            updated.append(other_file.get_basename())
+        else:
+            return
+
+        with self._lock:
+            self.generation += 1
+            # If nothing is loaded yet, the first use reads the folder.
+            if self._entries is not None:
+                for name in removed:
+                    self._entries.pop(name, None)
+                for name in updated:
+                    custom_def = self._load(name)
+                    if custom_def is None:
+                        self._entries.pop(name, None)
+                    else:
+                        self._entries[name] = custom_def
+                # Saving a file or copying a folder fires a burst of events,
+                # so the indexes are rebuilt once, after it has settled.
+                if self._reindex_source is not None:
+                    GLib.source_remove(self._reindex_source)
+                self._reindex_source = GLib.timeout_add(REINDEX_DELAY, self._reindex)
+        if self._on_change is not None:
+            self._on_change()
+
+    def _reindex(self):
+        """Rebuild the indexes of the names once the definitions have changed."""
+        self._reindex_source = None
+        with self._lock:
+            names = list(self._entries)
+        # Built outside the lock, so lookups aren't held up meanwhile.
+        index = PrefixIndex(names)
+        suggestion_index = TrigramIndex(names)
+        with self._lock:
+            self._index = index
+            self._suggestion_index = suggestion_index
+        return GLib.SOURCE_REMOVE
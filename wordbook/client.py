@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+client contains a client and a load generator for the lookup service.
+
+client is a part of Wordbook.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import string
+import sys
+import time
+from collections import deque
+from itertools import count
+
+from wordbook import utils
+
+
+class Client:
+    """A blocking connection to the lookup service."""
+
+    def __init__(self, path=utils.SOCKET_FILE):
+        """Connect to the service listening on path."""
+        self._socket = socket.socket(socket.AF_UNIX)
+        self._socket.connect(path)
+        self._file = self._socket.makefile("rwb")
+        self._ids = count(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
+    def close(self):
+        """Close the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def request(self, op, term, **options):
+        """Send a single request and return its response."""
+        return self.pipeline([(op, term, options)])[0]
+
+    def pipeline(self, requests, depth=32):
+        """
+        Send many (op, term, options) requests, keeping up to depth of them in
+        flight, and return the responses in the same order.
+        """
+        responses = []
+        in_flight = 0
+        for op, term, options in requests:
+            if in_flight == depth:
+                self._file.flush()
+                responses.append(self._receive())
+                in_flight -= 1
+            request = {"id": next(self._ids), "op": op, "term": term, **options}
+            self._file.write(json.dumps(request, ensure_ascii=False).encode() + b"\n")
+            in_flight += 1
+        self._file.flush()
+        for _request in range(in_flight):
+            responses.append(self._receive())
+        return responses
+
+    def _receive(self):
+        """Read the next response."""
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The lookup service closed the connection.")
+        return json.loads(line)
+
+
+def _percentile(latencies, fraction):
+    """Return the given percentile of a sorted list of latencies."""
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def _workload(terms, total, seed):
+    """Return a reproducible mix of requests about the given terms."""
+    rng = random.Random(seed)
+    requests = []
+    for _request in range(total):
+        term = rng.choice(terms)
+        kind = rng.random()
+        if kind < 0.7:
+            requests.append(("define", term))
+        elif kind < 0.85:
+            requests.append(("complete", term[: rng.randint(1, max(1, len(term)))]))
+        elif kind < 0.95:
+            # Misspell the term the way a typo would.
+            position = rng.randrange(len(term))
+            typo = term[:position] + rng.choice(string.ascii_lowercase)
+            requests.append(("suggest", typo + term[position + 1 :]))
+        else:
+            requests.append(("pronounce", term))
+    return requests
+
+
+async def _run_client(path, requests, depth, latencies):
+    """Send requests over one connection, keeping depth of them in flight."""
+    reader, writer = await asyncio.open_unix_connection(path, limit=1 << 22)
+    sent = deque()
+    errors = 0
+
+    async def receive():
+        nonlocal errors
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("The lookup service closed the connection.")
+        op, start = sent.popleft()
+        latencies.setdefault(op, []).append(time.perf_counter() - start)
+        if not json.loads(line)["ok"]:
+            errors += 1
+
+    for request_id, (op, term) in enumerate(requests):
+        if len(sent) == depth:
+            await receive()
+        request = {"id": request_id, "op": op, "term": term}
+        sent.append((op, time.perf_counter()))
+        writer.write(json.dumps(request, ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+    while sent:
+        await receive()
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+
+async def bench(path, terms, clients=8, total=2000, depth=4, seed=0):
+    """Load the service from many clients at once and return latency statistics."""
+    requests = _workload(terms, total, seed)
+    latencies = {}
+    start_time = time.perf_counter()
+    errors = await asyncio.gather(
+        *(
+            _run_client(path, requests[index::clients], depth, latencies)
+            for index in range(clients)
+        )
+    )
+    elapsed = time.perf_counter() - start_time
+
+    def summary(values):
+        values = sorted(values)
+        return {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 0.5) * 1000, 3),
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+        }
+
+    return {
+        "clients": clients,
+        "pipeline": depth,
+        "requests": total,
+        "errors": sum(errors),
+        "requests_per_sec": round(total / elapsed, 1),
+        "all": summary([value for values in latencies.values() for value in values]),
+        "ops": {op: summary(values) for op, values in sorted(latencies.items())},
+    }
+
+
+def _sample_terms(path, size):
+    """Ask the service for terms to use in a benchmark."""
+    with Client(path) as client:
+        responses = client.pipeline(
+            [("complete", letter, {"limit": 100}) for letter in string.ascii_lowercase]
+        )
+    terms = [term for response in responses for term in response.get("result", ())]
+    return random.Random(0).sample(terms, min(size, len(terms)))
+
+
+def main(argv):
+    """Query the lookup service or benchmark it from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="wordbook", description="Talk to a running lookup service."
+    )
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "--query",
+        nargs=2,
+        metavar=("OP", "TERM"),
+        help="send one request (define, complete, suggest or pronounce)",
+    )
+    mode.add_argument("--bench", action="store_true", help="measure request latency")
+    parser.add_argument(
+        "--socket", default=utils.SOCKET_FILE, help="socket the service listens on"
+    )
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests")
+    parser.add_argument(
+        "--pipeline", type=int, default=4, help="requests in flight per client"
+    )
+    parser.add_argument(
+        "--words", metavar="FILE", help="terms to look up, one per line"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        if args.query:
+            with Client(args.socket) as client:
+                response = client.request(*args.query)
+            print(json.dumps(response, indent=2, ensure_ascii=False))
+            return 0 if response["ok"] else 1
+
+        if args.words:
+            with open(args.words, "r") as words_file:
+                terms = [line.strip() for line in words_file if line.strip()]
+        else:
+            terms = _sample_terms(args.socket, 1000)
+        if not terms:
+            utils.log_error("There are no terms to look up.")
+            return 1
+        report = asyncio.run(
+            bench(
+                args.socket,
+                terms,
+                max(1, args.clients),
+                max(1, args.requests),
+                max(1, args.pipeline),
+            )
+        )
+    except OSError as err:
+        print(f"Couldn't reach the lookup service: {err}", file=sys.stderr)
+        return 1
+    print(json.dumps(report, indent=2))
+    return 0
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+download contains the resumable, verified download of WordNet archives.
+
+download is a part of Wordbook.
+"""
+
+import gzip
+import hashlib
+import lzma
+import os
+import zlib
+from urllib.parse import urlsplit
+
+import requests
+
+from wordbook import utils
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 10  # How long to wait for the server, in seconds.
+
+
+class VerificationError(Exception):
+    """Raised when an archive is damaged or doesn't match its checksum."""
+
+
+def fetch(urls, directory, progress):
+    """
+    Download the archive from the first of urls that works and return its path.
+
+    A download cut short by an earlier attempt is resumed where it stopped.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for index, url in enumerate(urls, 1):
+        path = os.path.join(directory, os.path.basename(urlsplit(url).path))
+        if os.path.isfile(path):
+            return path  # Already downloaded; it's verified before it's used.
+        try:
+            _fetch(url, path, progress)
+            return path
+        except requests.RequestException as err:
+            if index == len(urls):
+                raise
+            utils.log_warning(f"Download from {url} failed, trying the next: {err}")
+    raise requests.RequestException("There is nothing to download.")
+
+
+def _fetch(url, path, progress):
+    """
+    Download url to path, resuming from path + ".part" if it exists.
+
+    Next to the partial file is the validator (ETag or Last-Modified) of the
+    version of the file it holds, so a resume never splices two versions.
+    """
+    part_path = path + ".part"
+    validator_path = path + ".validator"
+    offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if os.path.isfile(validator_path):
+            with open(validator_path, "r") as validator_file:
+                validator = validator_file.read()
+            if validator:
+                headers["If-Range"] = validator
+
+    progress.set(status="Requesting", count=0, total=0)
+    with requests.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+        if response.status_code == 416 and offset:
+            # The partial file is no shorter than the file itself, so start over.
+            os.remove(part_path)
+            return _fetch(url, path, progress)
+        response.raise_for_status()
+        start, total = _content_range(response)
+        if start != offset:
+            offset = 0  # The server sent the whole file, or it changed since.
+            utils.log_info(f"Downloading {url}.")
+        else:
+            utils.log_info(f"Resuming the download of {url} at {offset} bytes.")
+
+        etag = response.headers.get("ETag", "")
+        validator = etag if etag and not etag.startswith("W/") else ""
+        validator = validator or response.headers.get("Last-Modified", "")
+        with open(validator_path, "w") as validator_file:
+            validator_file.write(validator)
+
+        progress.set(status="Receiving", count=offset, total=total)
+        with open(part_path, "ab" if offset else "wb") as part_file:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                part_file.write(chunk)
+                progress.update(len(chunk))
+            received = part_file.tell()
+    if total and received != total:
+        # Not every server reports a dropped connection, so the size is checked.
+        raise requests.RequestException(
+            f"The download stopped at {received} of {total} bytes."
+        )
+    os.replace(part_path, path)
+    os.remove(validator_path)
+    progress.set(status="Complete")
+
+
+def _content_range(response):
+    """Return where the body starts in the file and the size of the file."""
+    length = int(response.headers.get("Content-Length", 0))
+    if response.status_code != 206:
+        return 0, length
+    # Content-Range: bytes <first>-<last>/<size or *>
+    try:
+        first_last, size = response.headers["Content-Range"].split()[1].split("/")
+        start = int(first_last.split("-")[0])
+    except (KeyError, IndexError, ValueError) as err:
+        raise requests.RequestException("The server sent an invalid range.") from err
+    return start, int(size) if size != "*" else start + length
+
+
+def verify(path, sha256=None, progress=None):
+    """
+    Check an archive before it's imported. Raises VerificationError.
+
+    The SHA-256 digest is compared when one is given. Compressed archives are
+    read through once, which checks their own CRC, so a truncated or damaged
+    download is caught even when there is no published checksum.
+    """
+    with open(path, "rb") as archive:
+        magic = archive.read(6)
+        if magic[:2] == b"\x1f\x8b":
+            decompressor = gzip.open
+        elif magic == b"\xfd7zXZ\x00":
+            decompressor = lzma.open
+        else:
+            decompressor = None
+        passes = [sha256 is not None, decompressor is not None]
+        if progress is not None:
+            progress.set(
+                status="Verifying", count=0, total=os.path.getsize(path) * sum(passes)
+            )
+
+        if sha256 is not None:
+            digest = hashlib.sha256()
+            archive.seek(0)
+            for chunk in iter(lambda: archive.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                if progress is not None:
+                    progress.update(len(chunk))
+            if digest.hexdigest() != sha256.lower():
+                raise VerificationError(f"{path} doesn't match its SHA-256 checksum.")
+
+        if decompressor is not None:
+            archive.seek(0)
+            position = 0
+            try:
+                with decompressor(archive) as stream:
+                    while stream.read(16 * CHUNK_SIZE):
+                        if progress is not None:
+                            progress.update(archive.tell() - position)
+                        position = archive.tell()
+            except (OSError, EOFError, zlib.error, lzma.LZMAError) as err:
+                raise VerificationError(f"{path} is damaged: {err}") from err
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+espeak contains a resident binding to the libespeak-ng shared library.
+
+espeak is a part of Wordbook.
+"""
+
+import ctypes
+import ctypes.util
+import threading
+
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+INITIALIZE_DONT_EXIT = 0x8000
+CHARS_UTF8 = 1
+PHONEMES_IPA = 0x02
+
+
+class EspeakLibrary:
+    """Generates IPA through a single, resident libespeak-ng instance."""
+
+    def __init__(self):
+        """Load and initialize libespeak-ng. Raises OSError if unavailable."""
+        name = ctypes.util.find_library("espeak-ng") or "libespeak-ng.so.1"
+        self._lib = ctypes.CDLL(name)
+
+        self._lib.espeak_Initialize.argtypes = [
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_int,
+        ]
+        self._lib.espeak_Initialize.restype = ctypes.c_int
+        self._lib.espeak_Info.argtypes = [ctypes.POINTER(ctypes.c_char_p)]
+        self._lib.espeak_Info.restype = ctypes.c_char_p
+        self._lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        self._lib.espeak_SetVoiceByName.restype = ctypes.c_int
+        self._lib.espeak_TextToPhonemes.argtypes = [
+            ctypes.POINTER(ctypes.c_void_p),
+            ctypes.c_int,
+            ctypes.c_int,
+        ]
+        self._lib.espeak_TextToPhonemes.restype = ctypes.c_char_p
+
+        if (
+            self._lib.espeak_Initialize(
+                AUDIO_OUTPUT_SYNCHRONOUS, 0, None, INITIALIZE_DONT_EXIT
+            )
+            < 0
+        ):
+            raise OSError("libespeak-ng failed to initialize")
+
+        self.version = self._lib.espeak_Info(None).decode()
+        self._accent = None
+        # libespeak-ng keeps global state, so only one caller may use it at once.
+        self._lock = threading.Lock()
+
+    def _set_accent(self, accent):
+        """Switch the voice if the accent differs from the current one."""
+        if accent != self._accent:
+            if self._lib.espeak_SetVoiceByName(f"en-{accent}".encode()) != 0:
+                raise OSError(f"libespeak-ng has no voice for en-{accent}")
+            self._accent = accent
+
+    def _phonemes(self, term):
+        """Return the IPA for each clause of the term."""
+        buffer = ctypes.create_string_buffer(term.encode())
+        text_ptr = ctypes.c_void_p(ctypes.addressof(buffer))
+        clauses = []
+        while text_ptr.value:
+            phonemes = self._lib.espeak_TextToPhonemes(
+                ctypes.byref(text_ptr), CHARS_UTF8, PHONEMES_IPA
+            )
+            if phonemes:
+                clauses.append(phonemes.decode().strip())
+        return " ".join(clause for clause in clauses if clause)
+
+    def ipa(self, term, accent="us"):
+        """Return the IPA for a single term."""
+        with self._lock:
+            self._set_accent(accent)
+            return self._phonemes(term)
+
+    def ipa_many(self, terms, accent="us"):
+        """Return the IPA for many terms, holding the library only once."""
+        with self._lock:
+            self._set_accent(accent)
+            return [self._phonemes(term) for term in terms]
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+history contains the search history, kept in an append-only log.
+
+history is a part of Wordbook.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+
+from wordbook import utils
+from wordbook.settings import Settings
+
+
+class SearchHistory:
+    """Keeps every searched term with when and how often it was looked up."""
+
+    instance = None
+
+    def __init__(self, path=utils.HISTORY_FILE):
+        """Initialize the history. The log is read on first use."""
+        self.path = path
+        self._entries = None  # Term to entry, least recently searched first.
+        self._log_lines = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get():
+        """Return an instance of SearchHistory"""
+        if SearchHistory.instance is None:
+            SearchHistory.instance = SearchHistory()
+        return SearchHistory.instance
+
+    def __len__(self):
+        self.load()
+        return len(self._entries)
+
+    def add(self, term):
+        """Record a search for term. Returns True if the term is new."""
+        now = time.time()
+        self.load()
+        with self._lock:
+            entry = self._entries.get(term)
+            is_new = entry is None
+            if is_new:
+                entry = self._entries[term] = {"first": now, "last": now, "count": 0}
+            entry["last"] = now
+            entry["count"] += 1
+            self._entries.move_to_end(term)
+            self._trim()
+            try:
+                with open(self.path, "a") as log_file:
+                    log_file.write(json.dumps({"term": term, "time": now}) + "\n")
+                self._log_lines += 1
+                # Repeated searches only add lines, so squash them now and then.
+                if self._log_lines > 2 * max(len(self._entries), 100):
+                    self._compact()
+            except OSError:
+                utils.log_warning("Couldn't save the search history.")
+        return is_new
+
+    def entry(self, term):
+        """Return when term was first and last searched and how often, or None."""
+        self.load()
+        with self._lock:
+            entry = self._entries.get(term)
+            return dict(entry) if entry is not None else None
+
+    def page(self, offset, count):
+        """Return up to count terms, most recently searched first."""
+        self.load()
+        with self._lock:
+            return list(islice(reversed(self._entries), offset, offset + count))
+
+    def load(self):
+        """Read the log if that hasn't been done yet."""
+        with self._lock:
+            if self._entries is not None:
+                return
+            self._entries = OrderedDict()
+            if os.path.exists(self.path):
+                self._replay()
+            else:
+                self._migrate()
+            self._trim()
+            utils.log_info(f"Loaded {len(self._entries)} history entries.")
+
+    def _replay(self):
+        """Rebuild the entries from the log."""
+        try:
+            with open(self.path, "r") as log_file:
+                for line in log_file:
+                    self._log_lines += 1
+                    try:
+                        record = json.loads(line)
+                        term = record["term"]
+                        timestamp = record["time"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Most likely a line cut short by a crash.
+                    entry = self._entries.get(term)
+                    if entry is None:
+                        entry = self._entries[term] = {
+                            "first": record.get("first", timestamp),
+                            "last": timestamp,
+                            "count": 0,
+                        }
+                    entry["last"] = timestamp
+                    entry["count"] += record.get("count", 1)
+                    self._entries.move_to_end(term)
+        except OSError:
+            utils.log_warning("Couldn't read the search history.")
+
+    def _migrate(self):
+        """Move the history kept in the settings by older versions to the log."""
+        now = time.time()
+        for term in Settings.get().history:
+            self._entries[term] = {"first": now, "last": now, "count": 1}
+        try:
+            self._compact()
+        except OSError:
+            utils.log_warning("Couldn't save the search history.")
+            return
+        Settings.get().history = []
+
+    def _trim(self):
+        """Forget the least recently searched terms beyond the retention size."""
+        while len(self._entries) > Settings.get().history_size:
+            self._entries.popitem(last=False)
+
+    def _compact(self):
+        """Rewrite the log with a single line per term."""
+        with open(self.path + ".tmp", "w") as log_file:
+            for term, entry in self._entries.items():
+                record = {
+                    "term": term,
+                    "time": entry["last"],
+                    "first": entry["first"],
+                    "count": entry["count"],
+                }
+                log_file.write(json.dumps(record) + "\n")
+        os.replace(self.path + ".tmp", self.path)
+        self._log_lines = len(self._entries)
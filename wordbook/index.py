@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+index contains the in-memory lookup structures built over the WordNet wordlist.
+
+index is a part of Wordbook.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+
+def normalize(term):
+    """Normalize a term for index lookups."""
+    return term.replace("_", " ").casefold()
+
+
+def edit_distance(first, second):
+    """Return the Levenshtein distance between two strings."""
+    if len(first) < len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        current = [i]
+        for j, second_char in enumerate(second, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (first_char != second_char),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def _trigrams(key):
+    """Return the set of character trigrams of a normalized term."""
+    padded = f" {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PrefixIndex:
+    """A sorted array of normalized terms searched with binary search."""
+
+    def __init__(self, terms=()):
+        """Build the index from an iterable of terms."""
+        entries = {(normalize(term), term.replace("_", " ")) for term in terms}
+        entries = sorted(entries)
+        self._keys = [key for key, _name in entries]
+        self._names = [name for _key, name in entries]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def complete(self, prefix, limit=10):
+        """Return up to `limit` terms starting with the given prefix."""
+        key = normalize(prefix)
+        position = bisect_left(self._keys, key)
+        matches = []
+        while position < len(self._keys) and len(matches) < limit:
+            if not self._keys[position].startswith(key):
+                break
+            matches.append(self._names[position])
+            position += 1
+        return matches
+
+
+class TrigramIndex:
+    """An inverted index of character trigrams for approximate matching."""
+
+    def __init__(self, terms=()):
+        """Build the index from an iterable of terms."""
+        self._names = sorted({term.replace("_", " ") for term in terms})
+        self._sizes = array("H")
+        postings = defaultdict(lambda: array("I"))
+        for term_id, name in enumerate(self._names):
+            trigrams = _trigrams(normalize(name))
+            self._sizes.append(min(len(trigrams), 65535))
+            for trigram in trigrams:
+                postings[trigram].append(term_id)
+        self._postings = dict(postings)
+
+    def __len__(self):
+        return len(self._names)
+
+    def suggest(self, term, limit=5, candidates=64):
+        """Return up to `limit` indexed terms close to the given term."""
+        key = normalize(term)
+        trigrams = _trigrams(key)
+        counts = Counter()
+        for trigram in trigrams:
+            counts.update(self._postings.get(trigram, ()))
+
+        # Shortlist by trigram similarity, then rank by actual edit distance.
+        def similarity(item):
+            term_id, shared = item
+            return shared / (len(trigrams) + self._sizes[term_id] - shared)
+
+        shortlist = heapq.nlargest(candidates, counts.items(), key=similarity)
+        max_distance = max(1, len(key) // 3)
+        scored = []
+        for term_id, _shared in shortlist:
+            name = self._names[term_id]
+            distance = edit_distance(key, normalize(name))
+            if distance <= max_distance:
+                scored.append((distance, name))
+        return [name for _distance, name in sorted(scored)[:limit]]
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+install contains the headless management of the installed WordNet lexicons.
+
+install is a part of Wordbook.
+"""
+
+import argparse
+import sys
+
+from wordbook import base, utils
+from wordbook.settings import Settings
+
+
+def add_lexicon(path):
+    """Install the lexicons of a WN-LMF file and look definitions up in them."""
+    base.fold_gen()
+    added = base.WordnetDownloader.add(path)
+    if not added:
+        utils.log_warning(f"No new lexicon was found in {path}.")
+        return added
+    Settings.get().lexicons = list(dict.fromkeys(Settings.get().lexicons + added))
+    Settings.get().flush()
+    return added
+
+
+def install_archive(path, sha256=None):
+    """Install WordNet from an archive downloaded beforehand."""
+    # wn is slow to import, so it's only pulled in when installing.
+    from wn.util import ProgressBar
+
+    base.fold_gen()
+    base.WordnetDownloader.download(ProgressBar, path, sha256)
+
+
+def list_lexicons():
+    """Return every installed lexicon and whether it is looked up."""
+    enabled = Settings.get().lexicons
+    return [
+        (specifier, specifier in enabled)
+        for specifier in base.WordnetDownloader.installed_lexicons()
+    ]
+
+
+def main(argv):
+    """Manage the installed lexicons from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="wordbook", description="Manage the installed WordNet lexicons."
+    )
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "--add-lexicon",
+        metavar="FILE",
+        help="install a WN-LMF lexicon (.xml or .xml.gz) and look terms up in it",
+    )
+    mode.add_argument(
+        "--list-lexicons", action="store_true", help="show the installed lexicons"
+    )
+    mode.add_argument(
+        "--install-archive",
+        metavar="FILE",
+        help="install WordNet from an archive downloaded beforehand",
+    )
+    parser.add_argument(
+        "--sha256", metavar="HEX", help="checksum the archive must match"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="report what is being done"
+    )
+    args = parser.parse_args(argv)
+
+    utils.log_init(args.verbose)
+    # wn is slow to import, so it's only pulled in once the arguments are valid.
+    from wn import Error
+
+    from wordbook.download import VerificationError
+
+    try:
+        if args.install_archive:
+            install_archive(args.install_archive, args.sha256)
+            print(f"Installed WordNet from {args.install_archive}.")
+        elif args.add_lexicon:
+            for specifier in add_lexicon(args.add_lexicon):
+                print(f"Added {specifier}.")
+        else:
+            for specifier, enabled in list_lexicons():
+                print(f"{specifier}{' (looked up)' if enabled else ''}")
+    except (OSError, Error, VerificationError) as err:
+        print(f"Couldn't update WordNet: {err}", file=sys.stderr)
+        return 1
+    return 0
@@ -2,6 +2,9 @@
 # SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import json
+import time
+
 import gi
 
 from gettext import gettext as _
@@ -11,8 +14,8 @@ gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 from gi.repository import Adw, Gio, GLib, Gtk  # noqa
 
-from wordbook import base, utils  # noqa
-from wordbook.window import WordbookWindow  # noqa
+from wordbook import base, trace, utils  # noqa
+from wordbook.scheduler import Scheduler  # noqa
 from wordbook.settings import Settings  # noqa
 
 
@@ -24,6 +27,8 @@ class Application(Adw.Application):
     version = "0.0.0"
 
     lookup_term = ""
+    profile_startup = False
+    print_stats = False
     win = None
 
     def __init__(self, app_id, version):
@@ -63,6 +68,22 @@ class Application(Adw.Application):
             "Make it scream louder",
             None,
         )
+        self.add_main_option(
+            "profile-startup",
+            ord("p"),
+            GLib.OptionFlags.NONE,
+            GLib.OptionArg.NONE,
+            "Print how long each startup phase took on exit",
+            None,
+        )
+        self.add_main_option(
+            "stats",
+            ord("s"),
+            GLib.OptionFlags.NONE,
+            GLib.OptionArg.NONE,
+            "Time each stage of a lookup and print the statistics as JSON on exit",
+            None,
+        )
 
         Adw.StyleManager.get_default().set_color_scheme(
             Adw.ColorScheme.FORCE_DARK
@@ -81,6 +102,9 @@ class Application(Adw.Application):
         """Activate the application."""
         self.win = self.get_active_window()
         if not self.win:
+            start_time = time.perf_counter()
+            from wordbook.window import WordbookWindow
+
             self.win = WordbookWindow(
                 application=self,
                 title=_("Wordbook"),
@@ -88,8 +112,27 @@ class Application(Adw.Application):
             )
             self.setup_actions()
 
+            def on_first_frame(_widget, _frame_clock):
+                utils.startup_phase("first frame", start_time)
+                return GLib.SOURCE_REMOVE
+
+            self.win.add_tick_callback(on_first_frame)
+
         self.win.present()
 
+    def do_shutdown(self):
+        """Clean up before the application exits."""
+        Settings.get().flush()
+        Scheduler.get().shutdown()
+        base.stop_reading()
+        if self.profile_startup:
+            print(utils.startup_report())
+        if self.print_stats:
+            stats = trace.stats()
+            stats["scheduler"] = Scheduler.get().stats()
+            print(json.dumps(stats, indent=2, ensure_ascii=False))
+        Adw.Application.do_shutdown(self)
+
     def do_command_line(self, command_line):
         """Parse commandline arguments."""
         options = command_line.get_options_dict().end().unpack()
@@ -102,6 +145,13 @@ class Application(Adw.Application):
         if "look-up" in options:
             term = options["look-up"]
 
+        if "profile-startup" in options:
+            self.profile_startup = True
+
+        if "stats" in options:
+            self.print_stats = True
+            trace.enable()
+
         utils.log_init(self.development_mode or "verbose" in options or False)
 
         if self.win is not None:
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+morphology contains the reduction of inflected words to their WordNet lemmas.
+
+morphology is a part of Wordbook.
+"""
+
+from wordbook.cache import LRUCache
+
+# Suffixes Morphy removes from an inflected form, with what it puts back, for
+# each part of speech in the order their candidates are preferred.
+SUFFIX_RULES = (
+    (
+        "n",
+        (
+            ("s", ""),
+            ("ses", "s"),
+            ("ves", "f"),
+            ("ives", "ife"),
+            ("xes", "x"),
+            ("zes", "z"),
+            ("ches", "ch"),
+            ("shes", "sh"),
+            ("men", "man"),
+            ("ies", "y"),
+        ),
+    ),
+    (
+        "v",
+        (
+            ("s", ""),
+            ("ies", "y"),
+            ("es", "e"),
+            ("es", ""),
+            ("ed", "e"),
+            ("ed", ""),
+            ("ing", "e"),
+            ("ing", ""),
+        ),
+    ),
+    (
+        "a",
+        (
+            ("er", ""),
+            ("est", ""),
+            ("er", "e"),
+            ("est", "e"),
+        ),
+    ),
+)
+# Suffixes after which a doubled final consonant is undone, as in "stopped".
+_DOUBLING_SUFFIXES = ("ed", "ing", "er", "est")
+_VOWELS = frozenset("aeiou")
+_POSSESSIVES = ("'s", "’s", "'", "’")
+# Satellite adjectives take the inflections of the adjectives they're under.
+_ADJECTIVES = {"s": "a"}
+_ANY = object()  # Any part of speech, as opposed to None for an unknown one.
+
+
+class Morphology:
+    """
+    Maps inflected forms to the lemmas WordNet has for them, like Morphy.
+
+    Irregular forms come from a table of the other forms WordNet lists for its
+    entries, and regular ones from suffix rules checked against the lemmas of
+    the part of speech they inflect, so no lookup needs the database.
+
+    Candidates are (lemma, pos) pairs, where pos is a WordNet part of speech,
+    or None if the lemma may be any.
+    """
+
+    def __init__(self, lemmas, exceptions=()):
+        """
+        Initialize from (lemma, pos) pairs and the (form, lemma, pos) triples of
+        irregular forms. Satellite adjectives are inflected as adjectives.
+        """
+        # Every case variant of a lemma is kept, as in "dog" and "Dog", with the
+        # parts of speech of each.
+        self._lemmas = {}
+        for lemma, pos in lemmas:
+            pos = _ADJECTIVES.get(pos, pos)
+            parts = self._lemmas.setdefault(lemma.lower(), {}).setdefault(lemma, [])
+            if pos not in parts:
+                parts.append(pos)
+        self._exceptions = {}
+        for form, lemma, pos in exceptions:
+            candidate = (lemma, _ADJECTIVES.get(pos, pos))
+            lemmas_of_form = self._exceptions.setdefault(form.lower(), [])
+            if candidate not in lemmas_of_form:
+                lemmas_of_form.append(candidate)
+        self._memo = LRUCache("Base form", maxsize=8192)
+
+    def base_forms(self, term):
+        """
+        Return the (lemma, pos) pairs to look term up as: just term, in every
+        part of speech, unless it's inflected.
+
+        WordNet already finds every case variant of a lemma, so a term that is
+        a lemma in any case is looked up as it is.
+        """
+        if term.strip().lower().replace("_", " ") in self._lemmas:
+            return [(term, None)]
+        return list(self.lemmatize(term)) or [(term, None)]
+
+    def lemmatize(self, term):
+        """Return every (lemma, pos) term is a form of, the most likely first."""
+        lemmas = self._memo.get(term)
+        if lemmas is None:
+            lemmas = tuple(self.candidates(term))
+            self._memo.put(term, lemmas)
+        return lemmas
+
+    def candidates(self, term):
+        """Return every (lemma, pos) term may be a form of, the most likely first."""
+        spelling = term.strip().replace("_", " ")
+        form = spelling.lower()
+        if len(spelling) != len(form):
+            spelling = form  # Lowering changed the length, so case can't be kept.
+        candidates = list(self._word_candidates(form, spelling))
+        if not candidates and " " in form:
+            # Inflect either end of a collocation, as in "ice creams" or "gave up".
+            first, *middle, last = spelling.split(" ")
+            for word, pos in self._word_candidates(last.lower(), last):
+                candidates.append((" ".join([first, *middle, word]), pos))
+            for word, pos in self._word_candidates(first.lower(), first):
+                candidates.append((" ".join([word, *middle, last]), pos))
+            candidates = [
+                lemma
+                for candidate, pos in candidates
+                for lemma in self._variants(candidate.lower(), candidate, pos)
+            ]
+        return list(dict.fromkeys(candidates))
+
+    def _variants(self, key, spelling, pos=_ANY):
+        """
+        Return (lemma, pos) for the case variants of the lemma with the
+        lower-case key, in the part of speech pos if given.
+
+        The variant spelled as typed comes first, then the lower-case one, so
+        "dogs" is "dog" before it's "Dog", and "Dogs" the other way around.
+        """
+        variants = [
+            (lemma, lemma_pos)
+            for lemma, parts in self._lemmas.get(key, {}).items()
+            for lemma_pos in parts
+            if pos is _ANY or lemma_pos in (pos, None)
+        ]
+        if len(variants) < 2:
+            return variants
+        return sorted(
+            variants, key=lambda variant: (variant[0] != spelling, variant[0] != key)
+        )
+
+    def _word_candidates(self, form, spelling):
+        """
+        Yield the (lemma, pos) pairs a single lower-case form may be a form of.
+
+        spelling is the form as typed, used to order the case variants.
+        """
+        yield from self._variants(form, spelling)
+        yield from self._exceptions.get(form, ())
+        for possessive in _POSSESSIVES:
+            if form.endswith(possessive) and len(form) > len(possessive):
+                end = -len(possessive)
+                yield from self._word_candidates(form[:end], spelling[:end])
+                return
+        for pos, rules in SUFFIX_RULES:
+            for suffix, ending in rules:
+                if not form.endswith(suffix) or len(form) <= len(suffix):
+                    continue
+                stem = form[: -len(suffix)]
+                if stem + ending in self._lemmas:
+                    yield from self._variants(
+                        stem + ending, spelling[: len(stem)] + ending, pos
+                    )
+                elif (
+                    not ending
+                    and suffix in _DOUBLING_SUFFIXES
+                    and len(stem) > 2
+                    and stem[-1] == stem[-2]
+                    and stem[-1] not in _VOWELS
+                    and stem[:-1] in self._lemmas
+                ):
+                    yield from self._variants(stem[:-1], spelling[: len(stem) - 1], pos)
+
+    def stats(self):
+        """Return a short description of the memo's hit rate."""
+        return self._memo.stats()
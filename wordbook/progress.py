@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+progress contains the WordNet download progress reporting of the window.
+
+progress is a part of Wordbook.
+"""
+
+from gettext import gettext as _
+
+from gi.repository import Gio, GLib
+from wn.util import ProgressHandler
+
+
+class ProgressUpdater(ProgressHandler):
+    def set(self, **kwargs):
+        """Update the progress label when a new stage of the installation starts."""
+        status = kwargs.get("status")
+        if status is not None and status != self.kwargs.get("status"):
+            if status == "Receiving" and kwargs.get("count"):
+                self.flash(_("Resuming WordNet download…"))
+            elif status == "Receiving":
+                self.flash(_("Downloading WordNet…"))
+            elif status == "Verifying":
+                self.flash(_("Verifying WordNet…"))
+        super().set(**kwargs)
+
+    def update(self, n: int = 1, force: bool = False):
+        """Update the progress bar."""
+        self.kwargs["count"] += n
+        if self.kwargs["total"] > 0:
+            progress_fraction = self.kwargs["count"] / self.kwargs["total"]
+            GLib.idle_add(
+                Gio.Application.get_default().win.loading_progress.set_fraction,
+                progress_fraction,
+            )
+
+    @staticmethod
+    def flash(message):
+        """Update the progress label."""
+        if message == "Database":
+            GLib.idle_add(
+                Gio.Application.get_default().win.download_status_page.set_description,
+                _("Building Database…"),
+            )
+        else:
+            GLib.idle_add(
+                Gio.Application.get_default().win.download_status_page.set_description,
+                message,
+            )
+
+    def close(self):
+        """Signal the completion of building the WordNet database."""
+        if self.kwargs["message"] not in ("Download", "Read"):
+            Gio.Application.get_default().win.progress_complete()
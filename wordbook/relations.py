@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+relations contains set-based queries for everything shown about a synset.
+
+relations is a part of Wordbook.
+"""
+
+import sqlite3
+import threading
+
+_SYNSETS_QUERY = """
+    SELECT rowid, id
+      FROM synsets
+     WHERE id IN ({values})
+       AND lexicon_rowid IN ({lexicons})
+"""
+# Lemmas of the members of each synset, in the order wn lists them.
+_MEMBERS_QUERY = """
+    SELECT s.synset_rowid, s.rowid, f.form
+      FROM senses AS s
+      JOIN forms AS f ON f.entry_rowid = s.entry_rowid AND f.rank = 0
+     WHERE s.synset_rowid IN ({values})
+       AND s.lexicon_rowid IN ({lexicons})
+     ORDER BY s.synset_rowid, s.synset_rank, s.rowid
+"""
+_DEFINITIONS_QUERY = """
+    SELECT synset_rowid, definition
+      FROM definitions
+     WHERE synset_rowid IN ({values})
+       AND lexicon_rowid IN ({lexicons})
+     ORDER BY rowid
+"""
+_EXAMPLES_QUERY = """
+    SELECT synset_rowid, example
+      FROM synset_examples
+     WHERE synset_rowid IN ({values})
+       AND lexicon_rowid IN ({lexicons})
+     ORDER BY rowid
+"""
+# Lemmas of the synsets related to each synset by "similar" or "also".
+_SYNSET_RELATIONS_QUERY = """
+    SELECT r.source_rowid, t.type, f.form
+      FROM synset_relations AS r
+      JOIN relation_types AS t ON t.rowid = r.type_rowid
+      JOIN synsets AS target ON target.rowid = r.target_rowid
+      JOIN senses AS s ON s.synset_rowid = r.target_rowid
+      JOIN forms AS f ON f.entry_rowid = s.entry_rowid AND f.rank = 0
+     WHERE t.type IN ('similar', 'also')
+       AND r.source_rowid IN ({values})
+       AND r.lexicon_rowid IN ({lexicons})
+       AND target.lexicon_rowid IN ({lexicons})
+       AND s.lexicon_rowid IN ({lexicons})
+     ORDER BY r.rowid, s.synset_rank, s.rowid
+"""
+# Lemmas of the antonyms of each sense.
+_ANTONYMS_QUERY = """
+    SELECT r.source_rowid, f.form
+      FROM sense_relations AS r
+      JOIN relation_types AS t ON t.rowid = r.type_rowid
+      JOIN senses AS target ON target.rowid = r.target_rowid
+      JOIN forms AS f ON f.entry_rowid = target.entry_rowid AND f.rank = 0
+     WHERE t.type = 'antonym'
+       AND r.source_rowid IN ({values})
+       AND r.lexicon_rowid IN ({lexicons})
+       AND target.lexicon_rowid IN ({lexicons})
+     ORDER BY r.rowid
+"""
+# Every other form of an entry, such as "geese", with the entry's lemma and part
+# of speech.
+_FORMS_QUERY = """
+    SELECT f.form, l.form, e.pos
+      FROM forms AS f
+      JOIN forms AS l ON l.entry_rowid = f.entry_rowid AND l.rank = 0
+      JOIN entries AS e ON e.rowid = f.entry_rowid
+     WHERE f.rank > 0
+       AND f.lexicon_rowid IN ({lexicons})
+     ORDER BY f.entry_rowid, f.rank
+"""
+# The lemma of every entry, with its part of speech.
+_LEMMAS_QUERY = """
+    SELECT f.form, e.pos
+      FROM forms AS f
+      JOIN entries AS e ON e.rowid = f.entry_rowid
+     WHERE f.rank = 0
+       AND f.lexicon_rowid IN ({lexicons})
+     ORDER BY f.entry_rowid
+"""
+
+
+def _placeholders(values):
+    """Return the SQL placeholders for a list of values."""
+    return ", ".join("?" * len(values))
+
+
+def _read_members(select, details, sense_synsets):
+    """Add the lemmas of each synset, noting which synset each sense is in."""
+    for synset_rowid, sense_rowid, lemma in select(_MEMBERS_QUERY, list(details)):
+        details[synset_rowid]["lemmas"].append(lemma)
+        sense_synsets[sense_rowid] = synset_rowid
+
+
+def _read_definitions(select, details, _sense_synsets):
+    """Add the definition of each synset."""
+    defined = set()  # Only the first definition of a synset is shown.
+    for synset_rowid, definition in select(_DEFINITIONS_QUERY, list(details)):
+        if synset_rowid not in defined:
+            defined.add(synset_rowid)
+            details[synset_rowid]["definition"] = definition
+
+
+def _read_examples(select, details, _sense_synsets):
+    """Add the examples of each synset."""
+    for synset_rowid, example in select(_EXAMPLES_QUERY, list(details)):
+        details[synset_rowid]["examples"].append(example)
+
+
+def _read_synset_relations(select, details, _sense_synsets):
+    """Add the lemmas of the "similar" and "also see" synsets of each synset."""
+    for synset_rowid, rel_type, lemma in select(
+        _SYNSET_RELATIONS_QUERY, list(details)
+    ):
+        key = "sim" if rel_type == "similar" else "also"
+        details[synset_rowid][key].append(lemma)
+
+
+def _read_antonyms(select, details, sense_synsets):
+    """Add the antonyms of each synset, in the order of its senses."""
+    antonyms = {}
+    for sense_rowid, lemma in select(_ANTONYMS_QUERY, list(sense_synsets)):
+        antonyms.setdefault(sense_rowid, []).append(lemma)
+    for sense_rowid, synset_rowid in sense_synsets.items():
+        details[synset_rowid]["ant"].extend(antonyms.get(sense_rowid, ()))
+
+
+# The queries fetch runs after the synsets themselves, in order.
+_READERS = (
+    _read_members,
+    _read_definitions,
+    _read_examples,
+    _read_synset_relations,
+    _read_antonyms,
+)
+
+
+class RelationFetcher:
+    """Reads the details of many synsets from the WordNet database at once."""
+
+    def __init__(self, path):
+        """Initialize the fetcher. The database is opened on first use."""
+        self.path = path
+        self._connection = None
+        self._lexicons = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the database, e.g. before it is deleted."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+            self._lexicons = {}
+
+    def _connect(self):
+        """Return the read-only connection, opening it if needed."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        return self._connection
+
+    def _lexicon_rowids(self, connection, lexicons):
+        """Return the database rowids of lexicons given as id:version strings."""
+        key = tuple(sorted(lexicons))
+        if key not in self._lexicons:
+            rows = connection.execute(
+                "SELECT rowid FROM lexicons "
+                f"WHERE id || ':' || version IN ({_placeholders(key)})",
+                key,
+            ).fetchall()
+            self._lexicons[key] = [rowid for (rowid,) in rows]
+        return self._lexicons[key]
+
+    def fetch(self, lexicons, synset_ids, cancelled=None):
+        """
+        Return the details of each synset, keyed by synset id.
+
+        Each synset gets its lemmas, first definition, examples, antonym lemmas
+        and the lemmas of "similar" and "also see" synsets. This takes the same
+        handful of queries however many synsets there are, and cancelled() is
+        checked between them: None is returned once it's true. Raises
+        sqlite3.Error if the database can't be read.
+        """
+        with self._lock:
+            connection = self._connect()
+            lexicon_rowids = self._lexicon_rowids(connection, lexicons)
+            if not lexicon_rowids or not synset_ids:
+                return {}
+            # The rowids come from the database itself, so they can be inlined.
+            lexicon_list = ", ".join(str(int(rowid)) for rowid in lexicon_rowids)
+
+            def select(query, values):
+                return connection.execute(
+                    query.format(values=_placeholders(values), lexicons=lexicon_list),
+                    values,
+                )
+
+            details = {}
+            for rowid, synset_id in select(_SYNSETS_QUERY, list(synset_ids)):
+                details[rowid] = {
+                    "id": synset_id,
+                    "lemmas": [],
+                    "definition": None,
+                    "examples": [],
+                    "ant": [],
+                    "sim": [],
+                    "also": [],
+                }
+            if not details:
+                return {}
+
+            sense_synsets = {}
+            for read in _READERS:
+                if cancelled is not None and cancelled():
+                    return None
+                read(select, details, sense_synsets)
+        return {synset["id"]: synset for synset in details.values()}
+
+    def fetch_lemmas(self, lexicons):
+        """
+        Return (lemma, pos) pairs for the entries of the lexicons.
+        Raises sqlite3.Error if the database can't be read.
+        """
+        return self._fetch_all(_LEMMAS_QUERY, lexicons)
+
+    def fetch_forms(self, lexicons):
+        """
+        Return (form, lemma, pos) triples for the inflected forms the lexicons
+        list. Raises sqlite3.Error if the database can't be read.
+        """
+        return self._fetch_all(_FORMS_QUERY, lexicons)
+
+    def _fetch_all(self, query, lexicons):
+        """Return every row of a query over the given lexicons."""
+        with self._lock:
+            connection = self._connect()
+            lexicon_rowids = self._lexicon_rowids(connection, lexicons)
+            lexicon_list = ", ".join(str(int(rowid)) for rowid in lexicon_rowids)
+            if not lexicon_list:
+                return []
+            return connection.execute(query.format(lexicons=lexicon_list)).fetchall()
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+scheduler contains the shared, priority-aware worker pool of Wordbook.
+
+scheduler is a part of Wordbook.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from wordbook import utils
+
+# Priority classes, most urgent first.
+INTERACTIVE = 0
+COMPLETION = 1
+PRONUNCIATION = 2
+BACKGROUND = 3
+PRIORITY_NAMES = ("interactive", "completion", "pronunciation", "background")
+
+# Tasks that wait longer than this to start are logged, in seconds.
+SLOW_WAIT = 0.1
+
+
+class CancellationToken:
+    """Lets the submitter of a task ask it to stop. Call it to check."""
+
+    __slots__ = ("_cancelled",)
+
+    def __init__(self):
+        self._cancelled = False
+
+    def __call__(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Ask the task to stop, or not to start at all."""
+        self._cancelled = True
+
+
+class Scheduler:
+    """Runs tasks on a bounded set of threads, most urgent priority first."""
+
+    instance = None
+
+    def __init__(self, workers=None):
+        """Initialize the scheduler. Threads are started as work comes in."""
+        # One worker is always kept free for interactive tasks, and another for
+        # completions and speech, however much background work is running.
+        self.workers = max(3, workers or min(4, os.cpu_count() or 1))
+        self.background_slots = self.workers - 2
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._idle = 0
+        self._running_tokens = set()
+        self._closed = False
+
+        self._queued = [0] * len(PRIORITY_NAMES)
+        self._peak_queued = [0] * len(PRIORITY_NAMES)
+        self._running = [0] * len(PRIORITY_NAMES)
+        self._completed = [0] * len(PRIORITY_NAMES)
+        self._cancelled = [0] * len(PRIORITY_NAMES)
+        self._waits = [deque(maxlen=256) for _name in PRIORITY_NAMES]
+
+    @staticmethod
+    def get():
+        """Return an instance of Scheduler"""
+        if Scheduler.instance is None:
+            Scheduler.instance = Scheduler()
+        return Scheduler.instance
+
+    def submit(self, func, *args, priority=BACKGROUND, token=None, **kwargs):
+        """
+        Run func(*args, **kwargs) on a worker and return a future for its result.
+
+        A task whose token is cancelled before it starts is dropped.
+        """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                future.cancel()
+                return future
+            task = (future, func, args, kwargs, token, time.perf_counter())
+            heapq.heappush(self._queue, (priority, next(self._sequence), task))
+            self._queued[priority] += 1
+            self._peak_queued[priority] = max(
+                self._peak_queued[priority], self._queued[priority]
+            )
+            if len(self._queue) > self._idle and len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"Worker-{len(self._threads) + 1}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify_all()
+        return future
+
+    def yield_to_urgent(self, priority=BACKGROUND):
+        """
+        Block a long task while more urgent work is waiting, or while
+        interactive work is running.
+        """
+        with self._condition:
+            while not self._closed and (
+                any(self._queued[:priority])
+                or (priority != INTERACTIVE and self._running[INTERACTIVE])
+            ):
+                self._condition.wait()
+
+    def shutdown(self, timeout=2.0):
+        """Cancel every task and wait a little for the running ones to stop."""
+        with self._condition:
+            self._closed = True
+            for priority, _sequence, task in self._queue:
+                future, _func, _args, _kwargs, token, _submitted = task
+                if token is not None:
+                    token.cancel()
+                future.cancel()
+                self._queued[priority] -= 1
+                self._cancelled[priority] += 1
+            self._queue.clear()
+            for token in self._running_tokens:
+                token.cancel()
+            self._condition.notify_all()
+            threads = list(self._threads)
+        deadline = time.perf_counter() + timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.perf_counter()))
+
+    def stats(self):
+        """Return queue depths, wait times and task counts per priority class."""
+        with self._condition:
+            stats = {}
+            for priority, name in enumerate(PRIORITY_NAMES):
+                waits = sorted(self._waits[priority])
+                stats[name] = {
+                    "queued": self._queued[priority],
+                    "peak_queued": self._peak_queued[priority],
+                    "running": self._running[priority],
+                    "completed": self._completed[priority],
+                    "cancelled": self._cancelled[priority],
+                    "mean_wait_ms": round(
+                        sum(waits) / len(waits) * 1000 if waits else 0, 3
+                    ),
+                    "p99_wait_ms": round(
+                        waits[int(len(waits) * 0.99)] * 1000 if waits else 0, 3
+                    ),
+                    "max_wait_ms": round(waits[-1] * 1000 if waits else 0, 3),
+                }
+            return {
+                "workers": self.workers,
+                "background_slots": self.background_slots,
+                "classes": stats,
+            }
+
+    def _next_task(self):
+        """Wait for a task this worker may run. Returns None on shutdown."""
+        while not self._closed:
+            if self._queue:
+                priority = self._queue[0][0]
+                others_running = sum(self._running) - self._running[INTERACTIVE]
+                if priority == INTERACTIVE or (
+                    others_running < self.workers - 1
+                    and (
+                        priority != BACKGROUND
+                        or self._running[BACKGROUND] < self.background_slots
+                    )
+                ):
+                    return heapq.heappop(self._queue)
+            self._idle += 1
+            self._condition.wait()
+            self._idle -= 1
+        return None
+
+    def _work(self):
+        """Run tasks until the scheduler shuts down."""
+        while True:
+            with self._condition:
+                item = self._next_task()
+                if item is None:
+                    return
+                priority, _sequence, task = item
+                future, func, args, kwargs, token, submitted = task
+                self._queued[priority] -= 1
+                if (token is not None and token() and future.cancel()) or (
+                    not future.set_running_or_notify_cancel()
+                ):
+                    self._cancelled[priority] += 1
+                    continue
+                wait = time.perf_counter() - submitted
+                self._waits[priority].append(wait)
+                self._running[priority] += 1
+                if token is not None:
+                    self._running_tokens.add(token)
+            if wait > SLOW_WAIT:
+                utils.log_debug(
+                    f"A {PRIORITY_NAMES[priority]} task waited {wait * 1000:.0f} ms."
+                )
+
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as ex:  # pylint: disable=broad-except
+                future.set_exception(ex)
+            else:
+                future.set_result(result)
+            finally:
+                with self._condition:
+                    self._running[priority] -= 1
+                    self._completed[priority] += 1
+                    self._running_tokens.discard(token)
+                    self._condition.notify_all()
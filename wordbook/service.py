@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+service contains the headless lookup service of Wordbook.
+
+Clients connect to a Unix socket and send one JSON request per line, such as
+{"id": 1, "op": "define", "term": "serendipity"}. The ops are define, complete,
+suggest and pronounce. complete and suggest take an optional "limit", define and
+pronounce an optional "accent". Requests may be pipelined; each gets a single
+line back, {"id": ..., "ok": true, "result": ...} or {"id": ..., "ok": false,
+"error": ...}, in the order the requests were sent.
+
+service is a part of Wordbook.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+
+from wordbook import base, utils
+from wordbook.batch import format_result
+from wordbook.cache import LRUCache
+from wordbook.scheduler import COMPLETION, INTERACTIVE, PRONUNCIATION, Scheduler
+from wordbook.settings import Settings
+
+# Requests a client may have in flight before the service stops reading from it.
+MAX_PIPELINE = 64
+# Longest request line accepted, in bytes.
+MAX_LINE = 64 * 1024
+
+
+class RequestError(Exception):
+    """Raised when a request can't be answered as sent."""
+
+
+class LookupService:
+    """Answers lookup requests from a WordNet kept open between requests."""
+
+    def __init__(self, path=utils.SOCKET_FILE, accent="us"):
+        """Initialize the service. WordNet is loaded by run."""
+        self.path = path
+        self.accent = accent
+        self.served = 0
+        self._wn_data = None
+        self._suggestion_future = None
+        self._definitions = LRUCache("Service definition", maxsize=1024)
+        self._handlers = {
+            "define": (self._define, INTERACTIVE),
+            "complete": (self._complete, COMPLETION),
+            "suggest": (self._suggest, COMPLETION),
+            "pronounce": (self._pronounce, PRONUNCIATION),
+        }
+
+    async def run(self):
+        """Load WordNet and answer requests until interrupted."""
+        self._wn_data = await asyncio.wrap_future(
+            base.get_wn_file(lambda: None, Settings.get().lexicons)
+        )
+        if self._wn_data is None:
+            utils.log_error("Couldn't open WordNet. Run Wordbook once to repair it.")
+            return 1
+        self._suggestion_future = base.build_suggestion_index(self._wn_data["list"])
+
+        if not self._claim_socket():
+            utils.log_error(f"Another service is already listening on {self.path}.")
+            return 1
+        server = await asyncio.start_unix_server(
+            self._handle, path=self.path, limit=MAX_LINE
+        )
+        os.chmod(self.path, 0o600)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        utils.log_info(f"Listening on {self.path}.")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            Scheduler.get().shutdown()
+        utils.log_info(
+            f"Answered {self.served} requests. {self._definitions.stats()}"
+        )
+        return 0
+
+    def _claim_socket(self):
+        """Make way for the socket, unless a running service still owns it."""
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        if not os.path.exists(self.path):
+            return True
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)  # Left behind by a service that didn't stop cleanly.
+            return True
+        finally:
+            probe.close()
+        return False
+
+    async def _handle(self, reader, writer):
+        """Answer the requests of one client, in the order they were sent."""
+        responses = asyncio.Queue(MAX_PIPELINE)
+        sender = asyncio.create_task(self._send(responses, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await responses.put(_answered(None, "request too long"))
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await responses.put(asyncio.ensure_future(self._answer(line)))
+        finally:
+            await responses.put(None)
+            await sender
+            writer.close()
+
+    @staticmethod
+    async def _send(responses, writer):
+        """Write out each response once it and the ones before it are ready."""
+        connected = True
+        while True:
+            pending = await responses.get()
+            if pending is None:
+                return
+            if not connected:
+                pending.cancel()
+                continue
+            response = await pending
+            try:
+                writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+                if responses.empty():
+                    await writer.drain()
+            except ConnectionError:
+                connected = False  # Nobody is left to read the rest.
+
+    async def _answer(self, line):
+        """Run a single request and return its response."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("request must be an object")
+            request_id = request.get("id")
+            if request.get("op") not in self._handlers:
+                raise RequestError(f"unknown op: {request.get('op')}")
+            handler, priority = self._handlers[request["op"]]
+            if not isinstance(request.get("term"), str):
+                raise RequestError("term must be a string")
+            accent = request.get("accent", self.accent)
+            if accent not in ("us", "gb"):
+                raise RequestError("accent must be us or gb")
+            limit = request.get("limit", 10)
+            if not isinstance(limit, int) or not 0 < limit <= 100:
+                raise RequestError("limit must be between 1 and 100")
+        except ValueError:
+            return _response(request_id, error="request isn't valid JSON")
+        except RequestError as err:
+            return _response(request_id, error=str(err))
+
+        future = Scheduler.get().submit(
+            handler, base.cleaner(request["term"]), accent, limit, priority=priority
+        )
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            return _response(request_id, error="the service is stopping")
+        except RequestError as err:
+            return _response(request_id, error=str(err))
+        except Exception as err:  # pylint: disable=broad-except
+            utils.log_warning(f"Request failed: {err}")
+            return _response(request_id, error="lookup failed")
+        self.served += 1
+        return _response(request_id, result)
+
+    def _define(self, term, accent, _limit):
+        """Return the definition of term, as written by the batch mode."""
+        result = self._definitions.get((term, accent))
+        if result is None:
+            data = None
+            if term and not term.isspace():
+                data = base.get_data(
+                    term, "green", "blue", self._wn_data["instance"], accent
+                )
+            result = format_result(term, data)
+            self._definitions.put((term, accent), result)
+        return result
+
+    def _complete(self, prefix, _accent, limit):
+        """Return up to limit terms starting with prefix."""
+        return self._wn_data["index"].complete(prefix, limit)
+
+    def _suggest(self, term, _accent, limit):
+        """Return up to limit terms close to a misspelled term."""
+        # Waiting for the index would hold a worker other requests need.
+        if not self._suggestion_future.done():
+            raise RequestError("suggestions aren't ready yet, try again shortly")
+        return self._suggestion_future.result().suggest(term, limit)
+
+    @staticmethod
+    def _pronounce(term, accent, _limit):
+        """Return the IPA pronunciation of term, or None without espeak-ng."""
+        pronunciation = base.get_pronunciation(term, accent)
+        return pronunciation.strip() if pronunciation else None
+
+
+def _response(request_id, result=None, error=None):
+    """Build the response to a request."""
+    if error is not None:
+        return {"id": request_id, "ok": False, "error": error}
+    return {"id": request_id, "ok": True, "result": result}
+
+
+def _answered(request_id, error):
+    """Return a finished future holding an error response."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(_response(request_id, error=error))
+    return future
+
+
+def main(argv):
+    """Run the lookup service from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="wordbook", description="Answer lookup requests over a Unix socket."
+    )
+    parser.add_argument(
+        "--serve",
+        required=True,
+        nargs="?",
+        const=utils.SOCKET_FILE,
+        metavar="SOCKET",
+        help=f"socket to listen on (default: {utils.SOCKET_FILE})",
+    )
+    parser.add_argument(
+        "--accent", choices=("us", "gb"), default="us", help="default accent"
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="report the requests answered on exit",
+    )
+    args = parser.parse_args(argv)
+
+    utils.log_init(args.verbose)
+    if not base.WordnetDownloader.check_status():
+        utils.log_error("WordNet hasn't been downloaded yet. Run Wordbook once first.")
+        return 1
+    return asyncio.run(LookupService(args.serve, args.accent).run())
@@ -5,9 +5,16 @@
 import configparser
 import json
 import os
+import threading
+import time
+
+from gi.repository import GLib
 
 from wordbook import utils
 
+# How long to wait for more changes before writing the settings, in ms.
+SAVE_DELAY = 1000
+
 
 class Settings:
     """Manages all the settings of the application."""
@@ -17,11 +24,19 @@ class Settings:
 
     def __init__(self):
         """Initialize configuration."""
+        self._snapshot = {}
+        self._dirty = False
+        self._save_source = None
+        self._lock = threading.RLock()
         if not os.path.exists(utils.CONFIG_FILE):
             self.config["Behavior"] = {
                 "CustomDefinitions": "yes",
                 "LiveSearch": "yes",
+                "LiveSearchDelay": "250",
                 "DoubleClick": "no",
+                "DefinitionStore": "yes",
+                "HistorySize": "1000",
+                "Lexicons": '["oewn:2021"]',
                 "PronunciationsAccent": "us",
             }
             self.config["Appearance"] = {
@@ -37,17 +52,27 @@ class Settings:
     @property
     def cdef(self):
         """Get custom definition status."""
-        return self.config.getboolean("Behavior", "CustomDefinitions")
+        return self._value("Behavior", "CustomDefinitions", bool)
 
     @cdef.setter
     def cdef(self, value):
         """Set custom definition status."""
         self.set_boolean_key("Behavior", "CustomDefinitions", value)
 
+    @property
+    def definition_store(self):
+        """Get whether to precompile definitions for faster lookups."""
+        return self._value("Behavior", "DefinitionStore", bool, fallback=True)
+
+    @definition_store.setter
+    def definition_store(self, value):
+        """Set whether to precompile definitions for faster lookups."""
+        self.set_boolean_key("Behavior", "DefinitionStore", value)
+
     @property
     def double_click(self):
         """Get whether to search on double click."""
-        return self.config.getboolean("Behavior", "DoubleClick")
+        return self._value("Behavior", "DoubleClick", bool)
 
     @double_click.setter
     def double_click(self, value):
@@ -58,13 +83,15 @@ class Settings:
     def get():
         """Return an instance of Settings"""
         if Settings.instance is None:
+            start_time = time.perf_counter()
             Settings.instance = Settings()
+            utils.startup_phase("settings parse", start_time)
         return Settings.instance
 
     @property
     def gtk_dark_ui(self):
         """Get GTK theme setting."""
-        return self.config.getboolean("Appearance", "ForceDarkMode")
+        return self._value("Appearance", "ForceDarkMode", bool)
 
     @gtk_dark_ui.setter
     def gtk_dark_ui(self, value):
@@ -73,25 +100,54 @@ class Settings:
 
     @property
     def history(self):
-        """Get search history."""
-        return json.loads(self.config.get("Misc", "History"))
+        """Get the search history saved by versions without a history log."""
+        return list(self._value("Misc", "History", list))
 
     @history.setter
     def history(self, value):
-        """Set search history."""
-        self.config.set("Misc", "History", json.dumps(value))
-        self.save_settings()  # Manually save because set_boolean_key is not called.
+        """Set the search history saved by versions without a history log."""
+        self._set_key("Misc", "History", json.dumps(value))
+
+    @property
+    def history_size(self):
+        """Get how many searched terms to keep in the history."""
+        return self._value("Behavior", "HistorySize", int, fallback=1000)
+
+    @history_size.setter
+    def history_size(self, value):
+        """Set how many searched terms to keep in the history."""
+        self._set_key("Behavior", "HistorySize", str(value))
+
+    @property
+    def lexicons(self):
+        """Get the WordNet lexicons to look definitions up in."""
+        return list(self._value("Behavior", "Lexicons", list, fallback='["oewn:2021"]'))
+
+    @lexicons.setter
+    def lexicons(self, value):
+        """Set the WordNet lexicons to look definitions up in."""
+        self._set_key("Behavior", "Lexicons", json.dumps(value))
 
     @property
     def live_search(self):
         """Get whether to enable Live Search."""
-        return self.config.getboolean("Behavior", "LiveSearch")
+        return self._value("Behavior", "LiveSearch", bool)
 
     @live_search.setter
     def live_search(self, value):
         """Set whether to enable Live Search."""
         self.set_boolean_key("Behavior", "LiveSearch", value)
 
+    @property
+    def live_search_delay(self):
+        """Get how long to wait after typing stops before a live search, in ms."""
+        return self._value("Behavior", "LiveSearchDelay", int, fallback=250)
+
+    @live_search_delay.setter
+    def live_search_delay(self, value):
+        """Set how long to wait after typing stops before a live search, in ms."""
+        self._set_key("Behavior", "LiveSearchDelay", str(value))
+
     def load_settings(self):
         """Load settings from file."""
 
@@ -188,13 +244,12 @@ class Settings:
     @property
     def pronunciations_accent(self):
         """Get pronunciations accent."""
-        return self.config.get("Behavior", "PronunciationsAccent")
+        return self._value("Behavior", "PronunciationsAccent", str)
 
     @pronunciations_accent.setter
     def pronunciations_accent(self, value):
         """Set pronunciations accent."""
-        self.config.set("Behavior", "PronunciationsAccent", value)
-        self.save_settings()  # Manually save because set_boolean_key is not called.
+        self._set_key("Behavior", "PronunciationsAccent", value)
 
     @property
     def pronunciations_accent_value(self):
@@ -215,12 +270,61 @@ class Settings:
         elif value == 1:
             self.pronunciations_accent = "gb"
 
+    def flush(self):
+        """Write pending changes now. Call before exiting."""
+        with self._lock:
+            if self._save_source is not None:
+                GLib.source_remove(self._save_source)
+                self._save_source = None
+            if self._dirty:
+                self.save_settings()
+
     def save_settings(self):
-        """Save settings."""
-        with open(utils.CONFIG_FILE, "w") as file:
-            self.config.write(file)
+        """Save settings, replacing the file only once it's fully written."""
+        with self._lock:
+            temp_file = utils.CONFIG_FILE + ".tmp"
+            with open(temp_file, "w") as file:
+                self.config.write(file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_file, utils.CONFIG_FILE)
+            self._dirty = False
 
     def set_boolean_key(self, section, key, value):
         """Set a boolean value in the configuration file."""
-        self.config[section][key] = utils.boot_to_str(value)
-        self.save_settings()
+        self._set_key(section, key, utils.boot_to_str(value))
+
+    def _set_key(self, section, key, value):
+        """Set a value and save it shortly, along with any other changes."""
+        with self._lock:
+            self.config[section][key] = value
+            self._snapshot.pop((section, key), None)
+            self._dirty = True
+            if self._save_source is None:
+                self._save_source = GLib.timeout_add(SAVE_DELAY, self._on_save_timeout)
+
+    def _on_save_timeout(self):
+        """Write the settings changed since the last save."""
+        with self._lock:
+            self._save_source = None
+            if self._dirty:
+                try:
+                    self.save_settings()
+                except OSError:
+                    utils.log_error("Couldn't save the settings.")
+        return GLib.SOURCE_REMOVE
+
+    def _value(self, section, key, kind, **kwargs):
+        """Return a setting as the given type, parsing it only once."""
+        value = self._snapshot.get((section, key))
+        if value is None:
+            if kind is bool:
+                value = self.config.getboolean(section, key, **kwargs)
+            elif kind is int:
+                value = self.config.getint(section, key, **kwargs)
+            elif kind is list:
+                value = json.loads(self.config.get(section, key, **kwargs))
+            else:
+                value = self.config.get(section, key, **kwargs)
+            self._snapshot[(section, key)] = value
+        return value
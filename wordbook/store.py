@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+store contains the precompiled definition store built from the WordNet database.
+
+store is a part of Wordbook.
+"""
+
+import json
+import sqlite3
+import threading
+import zlib
+from itertools import islice
+
+# Bump this whenever the shape of the stored definitions changes.
+STORE_VERSION = 2
+
+
+class DefinitionStore:
+    """Keeps one compressed, ready-made definition per lemma in SQLite."""
+
+    def __init__(self, path):
+        """Initialize the store. Nothing is read until open() is called."""
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Open the database, creating the tables if needed."""
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS definitions "
+            "(term TEXT PRIMARY KEY, data BLOB NOT NULL)"
+        )
+        return connection
+
+    def _stored_key(self, connection):
+        """Return the key the store was completed with, if any."""
+        row = connection.execute(
+            "SELECT value FROM meta WHERE key = 'database'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def open(self, database_key):
+        """Start serving lookups if the store matches the database. Returns status."""
+        key = f"{STORE_VERSION} {database_key}"
+        with self._lock:
+            try:
+                connection = self._connect()
+                if self._stored_key(connection) != key:
+                    connection.close()
+                    self._connection = None
+                    return False
+            except sqlite3.Error:
+                self._connection = None
+                return False
+            self._connection = connection
+            return True
+
+    def get(self, term):
+        """Return the stored definition of term, or None if there isn't one."""
+        with self._lock:
+            if self._connection is None:
+                return None
+            try:
+                row = self._connection.execute(
+                    "SELECT data FROM definitions WHERE term = ?", (term,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def build(self, database_key, entries, cancelled=None):
+        """Fill the store from (term, definition) pairs. Returns False if cancelled."""
+        key = f"{STORE_VERSION} {database_key}"
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM meta")
+                connection.execute("DELETE FROM definitions")
+            while True:
+                if cancelled is not None and cancelled():
+                    return False
+                batch = list(islice(entries, 500))
+                if not batch:
+                    break
+                with connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO definitions VALUES (?, ?)",
+                        (
+                            (term, zlib.compress(json.dumps(definition).encode()))
+                            for term, definition in batch
+                        ),
+                    )
+            # The key is only written once every definition is in place.
+            with connection:
+                connection.execute(
+                    "INSERT INTO meta VALUES ('database', ?)", (key,)
+                )
+        finally:
+            connection.close()
+        return self.open(database_key)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+trace contains the optional timing of each stage of a lookup.
+
+trace is a part of Wordbook.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Upper bounds of the histogram buckets, in milliseconds.
+BUCKETS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+_BUCKET_NAMES = [f"<={bound:g}ms" for bound in BUCKETS[:-1]] + [
+    f">{BUCKETS[-2]:g}ms"
+]
+# Number of recent samples each stage keeps its statistics over.
+WINDOW = 1000
+
+_enabled = False
+_lock = threading.Lock()
+_samples = {}
+_recent = deque(maxlen=100)
+_local = threading.local()
+
+
+class _Span:
+    """Times one stage of a lookup when used as a context manager."""
+
+    __slots__ = ("stage", "term", "hit", "_start")
+
+    def __init__(self, stage, term):
+        self.stage = stage
+        self.term = term
+        self.hit = None
+
+    def __enter__(self):
+        _stack().append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc_info):
+        duration = (time.perf_counter() - self._start) * 1000
+        _stack().pop()
+        with _lock:
+            samples = _samples.get(self.stage)
+            if samples is None:
+                samples = _samples[self.stage] = deque(maxlen=WINDOW)
+            samples.append((duration, self.hit))
+            _recent.append(
+                {
+                    "stage": self.stage,
+                    "term": self.term,
+                    "ms": round(duration, 3),
+                    "hit": self.hit,
+                }
+            )
+
+
+class _NullSpan:
+    """Stands in for a span while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _stack():
+    """Return the spans open on the current thread, innermost last."""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def enable():
+    """Start recording spans."""
+    global _enabled
+    _enabled = True
+
+
+def span(stage, term=None):
+    """Return a context manager that times the given stage if tracing is on."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(stage, term)
+
+
+def mark(hit):
+    """Record whether the innermost open span was served from a cache."""
+    if _enabled:
+        stack = _stack()
+        if stack:
+            stack[-1].hit = hit
+
+
+def _percentile(durations, fraction):
+    """Return the given percentile of a sorted list of durations."""
+    return durations[min(len(durations) - 1, int(len(durations) * fraction))]
+
+
+def stats():
+    """Return the statistics of each stage as a JSON-friendly dict."""
+    with _lock:
+        samples = {stage: list(values) for stage, values in _samples.items()}
+        recent = list(_recent)
+    stages = {}
+    for stage, stage_samples in sorted(samples.items()):
+        durations = sorted(duration for duration, _hit in stage_samples)
+        histogram = [0] * len(BUCKETS)
+        for duration in durations:
+            histogram[bisect_left(BUCKETS, duration)] += 1
+        stages[stage] = {
+            "count": len(durations),
+            "hits": sum(1 for _duration, hit in stage_samples if hit is True),
+            "misses": sum(1 for _duration, hit in stage_samples if hit is False),
+            "mean_ms": round(sum(durations) / len(durations), 3),
+            "p50_ms": round(_percentile(durations, 0.5), 3),
+            "p90_ms": round(_percentile(durations, 0.9), 3),
+            "p99_ms": round(_percentile(durations, 0.99), 3),
+            "max_ms": round(durations[-1], 3),
+            "histogram": {
+                name: count for name, count in zip(_BUCKET_NAMES, histogram) if count
+            },
+        }
+    return {"window": WINDOW, "stages": stages, "recent": recent}
@@ -5,6 +5,7 @@
 """utils contains a few global variables and essential functions."""
 import logging
 import os
+import time
 import traceback
 
 from gi.repository import GLib
@@ -16,12 +17,17 @@ CONFIG_FILE = os.path.join(CONFIG_DIR, "wordbook.conf")
 DATA_DIR = os.path.join(GLib.get_user_data_dir(), "wordbook")
 CDEF_DIR = os.path.join(DATA_DIR, "cdef")
 WN_DIR = os.path.join(DATA_DIR, "wn")
+HISTORY_FILE = os.path.join(DATA_DIR, "history.jsonl")
+PRON_CACHE_FILE = os.path.join(DATA_DIR, "pronunciations.db")
+SOCKET_FILE = os.path.join(GLib.get_user_runtime_dir(), "wordbook", "lookup.sock")
 
 logging.basicConfig(
     format="%(asctime)s - [%(levelname)s] [%(threadName)s] (%(module)s:%(lineno)d) %(message)s"
 )
 LOGGER = logging.getLogger()
 
+_startup_phases = []
+
 
 def boot_to_str(boolean):
     """Convert boolean to string for configuration parser."""
@@ -77,3 +83,25 @@ def log_warning(message):
     trace = traceback.format_exc()
     if trace.strip() != "NoneType: None":
         LOGGER.warning(traceback.format_exc())
+
+
+def startup_phase(name, start, end=None):
+    """Record how long a startup phase took, from perf_counter() timestamps."""
+    if end is None:
+        end = time.perf_counter()
+    _startup_phases.append((name, start, end))
+    LOGGER.debug(f"Startup: {name} took {(end - start) * 1000:.1f} ms.")
+
+
+def startup_report():
+    """Return the recorded startup phases as a printable table."""
+    if not _startup_phases:
+        return "No startup phases were recorded."
+    origin = min(start for _name, start, _end in _startup_phases)
+    lines = [f"{'Phase':<20}{'Took':>10}{'Done at':>10}"]
+    for name, start, end in sorted(_startup_phases, key=lambda phase: phase[2]):
+        lines.append(
+            f"{name:<20}{(end - start) * 1000:>7.1f} ms"
+            f"{(end - origin) * 1000:>7.1f} ms"
+        )
+    return "\n".join(lines)
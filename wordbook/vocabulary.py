@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+vocabulary contains the extraction of the distinct words of a text document.
+
+vocabulary is a part of Wordbook.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from wordbook import base, batch, utils
+from wordbook.cache import LRUCache
+from wordbook.settings import Settings
+
+# Words too common to be worth looking up.
+STOP_WORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because
+    been before being below between both but by can could did do does doing
+    down during each few for from further had has have having he her here hers
+    herself him himself his how i if in into is it its itself just me more
+    most my myself no nor not now of off on once only or other our ours
+    ourselves out over own same she should so some such than that the their
+    theirs them themselves then there these they this those through to too
+    under until up very was we were what when where which while who whom why
+    will with would you your yours yourself yourselves
+    """.split()
+)
+
+# Runs of letters, joined by inner apostrophes or hyphens.
+_WORD = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+
+
+class Extractor:
+    """Turns running text into the distinct WordNet lemmas it uses."""
+
+    def __init__(self, morphology, stop_words=STOP_WORDS):
+        """Initialize the extractor with the Morphology of the lexicons."""
+        self.words = 0
+        self.stop_words = 0
+        self.unknown = 0
+        self._morphology = morphology
+        self._stop_words = stop_words
+        # Forms already seen map to their lemma, or to "" if WordNet lacks it.
+        self._forms = LRUCache("Vocabulary form", maxsize=65536)
+        self._lemmas = set()
+
+    def lemmas(self, file, cancelled=None):
+        """
+        Yield (lemma, form) for every lemma of file the first time it's used.
+
+        The file is read a line at a time, so only the vocabulary is kept in
+        memory, never the text.
+        """
+        for line in file:
+            if cancelled is not None and cancelled():
+                return
+            for match in _WORD.finditer(line):
+                self.words += 1
+                form = base.cleaner(match.group()).lower()
+                if form.endswith(("'s", "’s")):
+                    form = form[:-2]
+                if not form or form in self._stop_words:
+                    self.stop_words += 1
+                    continue
+                lemma = self._forms.get(form)
+                if lemma is None:
+                    candidates = self._morphology.candidates(form)
+                    lemma = candidates[0][0] if candidates else ""
+                    self._forms.put(form, lemma)
+                    if not lemma:
+                        self.unknown += 1
+                if lemma and lemma not in self._lemmas:
+                    self._lemmas.add(lemma)
+                    yield lemma, form
+
+    def stats(self, elapsed):
+        """Return a short description of the words read."""
+        return (
+            f"Read {self.words} words in {elapsed:.2f}s "
+            f"({self.words / elapsed if elapsed else 0:.1f} words/sec): "
+            f"{len(self._lemmas)} distinct lemmas, {self.stop_words} stop words, "
+            f"{self.unknown} forms not in WordNet."
+        )
+
+
+def _write_json(entries, output):
+    """Write the glossary as a JSON array, one entry at a time."""
+    output.write("[")
+    for index, entry in enumerate(entries):
+        output.write(",\n" if index else "\n")
+        output.write(json.dumps(entry, ensure_ascii=False))
+    output.write("\n]\n")
+
+
+def _write_csv(entries, output):
+    """Write the glossary as CSV, one row per sense."""
+    writer = csv.writer(output)
+    writer.writerow(("term", "form", "part_of_speech", "definition", "examples"))
+    for entry in entries:
+        for pos, synsets in entry.get("result", {}).items():
+            for synset in synsets:
+                writer.writerow(
+                    (
+                        entry["query"],
+                        entry["form"],
+                        pos,
+                        synset["definition"],
+                        "; ".join(synset["examples"]),
+                    )
+                )
+
+
+def run(file, output, workers, accent="us", output_format="json"):
+    """Define every distinct word of file in parallel and write a glossary."""
+    wn_instance = base.open_wordnet(Settings.get().lexicons)
+    extractor = Extractor(wn_instance.morphology())
+    forms = {}
+
+    def terms():
+        for lemma, form in extractor.lemmas(file):
+            forms[lemma] = form
+            yield lemma
+
+    def entries():
+        for result in batch.resolve(terms(), workers, accent):
+            result["form"] = forms.pop(result["query"])
+            yield result
+
+    start_time = time.perf_counter()
+    if output_format == "csv":
+        _write_csv(entries(), output)
+    else:
+        _write_json(entries(), output)
+    output.flush()
+    utils.log_info(extractor.stats(time.perf_counter() - start_time))
+    return extractor
+
+
+def main(argv):
+    """Run the vocabulary extraction mode from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="wordbook", description="Define every distinct word of a text."
+    )
+    parser.add_argument(
+        "--vocabulary",
+        required=True,
+        metavar="FILE",
+        help="text file to read, or - for standard input",
+    )
+    parser.add_argument(
+        "--format", choices=("json", "csv"), default="json", help="glossary format"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes",
+    )
+    parser.add_argument(
+        "--accent", choices=("us", "gb"), default="us", help="pronunciations accent"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="report the words read"
+    )
+    args = parser.parse_args(argv)
+
+    utils.log_init(args.verbose)
+    if not base.WordnetDownloader.check_status():
+        utils.log_error("WordNet hasn't been downloaded yet. Run Wordbook once first.")
+        return 1
+
+    workers = max(1, args.workers)
+    if args.vocabulary == "-":
+        run(sys.stdin, sys.stdout, workers, args.accent, args.format)
+    else:
+        with open(args.vocabulary, "r", errors="replace") as file:
+            run(file, sys.stdout, workers, args.accent, args.format)
+    return 0
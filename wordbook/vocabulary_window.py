@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import time
+from gettext import gettext as _
+
+from gi.repository import Adw, GLib, Gtk, Pango
+
+from wordbook import utils
+from wordbook.scheduler import BACKGROUND, CancellationToken, Scheduler
+from wordbook.vocabulary import Extractor
+
+# Lemmas added to the list at a time, so a long text doesn't flood the UI.
+ROW_BATCH = 256
+
+
+@Gtk.Template(resource_path=f"{utils.RES_PATH}/ui/vocabulary_window.ui")
+class VocabularyWindow(Adw.Window):
+    """Lists the distinct words of a text file, each a click from its definition."""
+
+    __gtype_name__ = "VocabularyWindow"
+
+    _window_title = Gtk.Template.Child("window_title")
+    _vocabulary_stack = Gtk.Template.Child("vocabulary_stack")
+    _vocabulary_list = Gtk.Template.Child("vocabulary_list")
+    _error_page = Gtk.Template.Child("error_page")
+
+    def __init__(self, parent, path, wn_future, **kwargs):
+        """Initialize the window and start reading the file."""
+        super().__init__(**kwargs)
+
+        self.parent = parent
+        self._lemmas = Gtk.StringList()
+        self._token = CancellationToken()
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup_row)
+        factory.connect("bind", self._on_bind_row)
+        self._vocabulary_list.set_factory(factory)
+        self._vocabulary_list.set_model(Gtk.NoSelection.new(self._lemmas))
+        self._vocabulary_list.connect("activate", self._on_row_activated)
+        self._window_title.set_subtitle(os.path.basename(path))
+        self.connect("close-request", self._on_close_request)
+
+        Scheduler.get().submit(
+            self._extract,
+            path,
+            wn_future,
+            self._token,
+            priority=BACKGROUND,
+            token=self._token,
+        )
+
+    def _extract(self, path, wn_future, token):
+        """Read the file and hand its lemmas to the list as they are found."""
+
+        def cancelled():
+            # Checked once a line, so searches and completions aren't held up.
+            Scheduler.get().yield_to_urgent()
+            return token()
+
+        start_time = time.perf_counter()
+        rows = []
+        wn_data = wn_future.result()
+        if wn_data is None:
+            GLib.idle_add(
+                self._show_error,
+                _("WordNet Isn't Available"),
+                _("WordNet couldn't be loaded, so no words can be looked up."),
+            )
+            return
+        try:
+            extractor = Extractor(wn_data["instance"].morphology())
+            with open(path, "r", errors="replace") as file:
+                for lemma, _form in extractor.lemmas(file, cancelled):
+                    rows.append(lemma)
+                    if len(rows) == ROW_BATCH:
+                        GLib.idle_add(self._add_rows, rows)
+                        rows = []
+        except OSError as err:
+            utils.log_warning(f"Couldn't read {path}.")
+            GLib.idle_add(
+                self._show_error,
+                _("Couldn't Read File"),
+                err.strerror or _("The file couldn't be opened."),
+            )
+            return
+        utils.log_info(extractor.stats(time.perf_counter() - start_time))
+        GLib.idle_add(self._add_rows, rows, True)
+
+    def _add_rows(self, rows, done=False):
+        """Append lemmas to the list."""
+        self._lemmas.splice(self._lemmas.get_n_items(), 0, rows)
+        if self._lemmas.get_n_items():
+            self._vocabulary_stack.set_visible_child_name("list")
+        elif done:
+            self._vocabulary_stack.set_visible_child_name("empty")
+        return GLib.SOURCE_REMOVE
+
+    def _show_error(self, title, description):
+        """Show why the words of the file can't be listed."""
+        self._error_page.set_title(title)
+        self._error_page.set_description(GLib.markup_escape_text(description))
+        self._vocabulary_stack.set_visible_child_name("error")
+        return GLib.SOURCE_REMOVE
+
+    @staticmethod
+    def _on_setup_row(_factory, list_item):
+        """Create the label of a row."""
+        label = Gtk.Label(xalign=0, ellipsize=Pango.EllipsizeMode.END)
+        list_item.set_child(label)
+
+    @staticmethod
+    def _on_bind_row(_factory, list_item):
+        """Show a lemma in a row."""
+        list_item.get_child().set_label(list_item.get_item().get_string())
+
+    def _on_row_activated(self, _list_view, position):
+        """Look the clicked lemma up in the main window."""
+        self.parent.trigger_search(self._lemmas.get_string(position))
+
+    def _on_close_request(self, _window):
+        """Stop reading the file once the window is closed."""
+        self._token.cancel()
+        return False
@@ -2,21 +2,37 @@
 # SPDX-FileCopyrightText: 2016-2022 Mufeed Ali <fushinari@protonmail.com>
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import os
 import random
+import re
 import sys
 import threading
+import time
 from enum import Enum
 from gettext import gettext as _
 from html import escape
 
 from gi.repository import Adw, Gdk, Gio, GLib, GObject, Gtk
-from wn import Error
-from wn.util import ProgressHandler
 
-from wordbook import base, utils
+from wordbook import base, trace, utils
+from wordbook.cache import LRUCache
+from wordbook.cdef import CustomDefinitions
+from wordbook.history import SearchHistory
+from wordbook.scheduler import (
+    BACKGROUND,
+    COMPLETION,
+    INTERACTIVE,
+    PRONUNCIATION,
+    CancellationToken,
+    Scheduler,
+)
 from wordbook.settings import Settings
-from wordbook.settings_window import SettingsWindow
+
+HISTORY_PAGE_SIZE = 50
+# Searches that give a new result every time, so they are always run.
+_EXCEPT_LIST = ("fortune -a", "cowfortune")
+# How many linked words of a result to look up ahead of a click.
+PREFETCH_BUDGET = 8
+_LINK_PATTERN = re.compile(r'<a href="search;([^"]+)">')
 
 
 @Gtk.Template(resource_path=f"{utils.RES_PATH}/ui/window.ui")
@@ -34,6 +50,8 @@ class WordbookWindow(Adw.ApplicationWindow):
     _speak_button = Gtk.Template.Child("speak_button")
     _menu_button = Gtk.Template.Child("wordbook_menu_button")
     _flap = Gtk.Template.Child("main_flap")
+    _history_stack = Gtk.Template.Child("history_stack")
+    _history_scroll = Gtk.Template.Child("history_scroll")
     _history_listbox = Gtk.Template.Child("history_listbox")
     _stack = Gtk.Template.Child("main_stack")
     _main_scroll = Gtk.Template.Child("main_scroll")
@@ -41,29 +59,49 @@ class WordbookWindow(Adw.ApplicationWindow):
     _def_ctrlr = Gtk.Template.Child("def_ctrlr")
     _pronunciation_view = Gtk.Template.Child("pronunciation_view")
     _term_view = Gtk.Template.Child("term_view")
+    _suggestions_label = Gtk.Template.Child("suggestions_label")
     _network_fail_status_page = Gtk.Template.Child("network_fail_status_page")
     _retry_button = Gtk.Template.Child("retry_button")
+    _install_file_button = Gtk.Template.Child("install_file_button")
     _exit_button = Gtk.Template.Child("exit_button")
 
     _style_manager = None
+    _archive_chooser = None
+    _text_chooser = None
 
     _wn_downloader = base.WordnetDownloader()
     _wn_future = None
+    _suggestion_future = None
 
     _doubled = False
     _completion_request_count = 0
     _searched_term = None
     _search_history = None
-    _search_history_list = []
+    _history_objects = None
+    _history_paged = False
+    _history_loading = False
     _search_queue = []
     _last_search_fail = False
-    _active_thread = None
+    _active_search = None
+    _queue_lock = None
+    _search_generation = 0
+    _debounce_source = None
+    _lookups_delivered = 0
+    _lookups_wasted = 0
+    _render_cache = None
+    _closing = False
+    _prefetch_token = None
+    _store_token = None
+    _prefetches_done = 0
+    _prefetches_used = 0
 
     def __init__(self, term="", **kwargs):
         """Initialize the window."""
         super().__init__(**kwargs)
 
         self.lookup_term = term
+        self._render_cache = LRUCache("Rendered definition", maxsize=128)
+        self._queue_lock = threading.Lock()
 
         if Gio.Application.get_default().development_mode is True:
             self.get_style_context().add_class("devel")
@@ -75,19 +113,23 @@ class WordbookWindow(Adw.ApplicationWindow):
     def setup_widgets(self):
         """Setup the widgets in the window."""
         self._search_history = Gio.ListStore.new(HistoryObject)
+        self._history_objects = {}
         self._history_listbox.bind_model(self._search_history, self._create_label)
 
         self.connect("unrealize", self._on_destroy)
         self._key_ctrlr.connect("key-pressed", self._on_key_pressed)
         self._history_listbox.connect("row-activated", self._on_history_item_activated)
+        self._history_scroll.connect("edge-reached", self._on_history_edge_reached)
 
         self._def_ctrlr.connect("pressed", self._on_def_press_event)
         self._def_ctrlr.connect("stopped", self._on_def_stop_event)
         self._def_view.connect("activate-link", self._on_link_activated)
+        self._suggestions_label.connect("activate-link", self._on_link_activated)
         self.search_button.connect("clicked", self.on_search_clicked)
         self._search_entry.connect("changed", self._on_entry_changed)
         self._speak_button.connect("clicked", self._on_speak_clicked)
         self._retry_button.connect("clicked", self._on_retry_clicked)
+        self._install_file_button.connect("clicked", self._on_install_file_clicked)
         self._exit_button.connect("clicked", self._on_exit_clicked)
         self._main_scroll.get_vadjustment().connect(
             "value-changed", self._on_scroll_event
@@ -103,15 +145,14 @@ class WordbookWindow(Adw.ApplicationWindow):
         self._style_manager = self.get_application().get_style_manager()
         self._style_manager.connect("notify::dark", self._on_dark_style)
 
+        CustomDefinitions.get().watch(self._on_cdef_changed)
+
         # Loading and setup.
         self._dl_wn()
         if self._wn_downloader.check_status():
-            self._wn_future = base.get_wn_file(self._retry_dl_wn)
-            self._set_header_sensitive(True)
             self._page_switch(Page.WELCOME)
-            if self.lookup_term:
-                self.trigger_search(self.lookup_term)
-            self._search_entry.grab_focus_without_selecting()
+            # Let the first frame show up before WordNet starts loading.
+            GLib.idle_add(self._load_wn, priority=GLib.PRIORITY_LOW)
 
         # Completions
         self.completer = Gtk.EntryCompletion()
@@ -122,10 +163,7 @@ class WordbookWindow(Adw.ApplicationWindow):
         self._search_entry.set_completion(self.completer)
 
         # Load History.
-        self._search_history_list = Settings.get().history
-        for text in self._search_history_list:
-            history_object = HistoryObject(text)
-            self._search_history.insert(0, history_object)
+        self._load_history_page()
 
         # Set search button visibility.
         self.search_button.set_visible(not Settings.get().live_search)
@@ -148,6 +186,10 @@ class WordbookWindow(Adw.ApplicationWindow):
         search_selected_action.connect("activate", self.on_search_selected)
         self.add_action(search_selected_action)
 
+        extract_vocabulary_action = Gio.SimpleAction.new("extract-vocabulary", None)
+        extract_vocabulary_action.connect("activate", self.on_extract_vocabulary)
+        self.add_action(extract_vocabulary_action)
+
     def on_paste_search(self, _action, _param):
         """Search text in clipboard."""
         clipboard = Gdk.Display.get_default().get_clipboard()
@@ -162,14 +204,31 @@ class WordbookWindow(Adw.ApplicationWindow):
         cancellable = Gio.Cancellable()
         clipboard.read_text_async(cancellable, on_paste)
 
+    def on_extract_vocabulary(self, _action, _param):
+        """Let the user pick a text file to list the words of."""
+        self._text_chooser = Gtk.FileChooserNative.new(
+            _("Extract Vocabulary"), self, Gtk.FileChooserAction.OPEN, None, None
+        )
+        text_filter = Gtk.FileFilter()
+        text_filter.set_name(_("Text files"))
+        text_filter.add_mime_type("text/plain")
+        self._text_chooser.add_filter(text_filter)
+        self._text_chooser.connect("response", self._on_text_chosen)
+        self._text_chooser.show()
+
     def on_preferences(self, _action, _param):
         """Show settings window."""
+        from wordbook.settings_window import SettingsWindow
+
         window = SettingsWindow(parent=self, transient_for=self)
         window.present()
 
     def on_random_word(self, _action, _param):
         """Search a random word from the wordlist."""
-        random_word = random.choice(self._wn_future.result()["list"])
+        wn_data = self._wn_data()
+        if wn_data is None:
+            return
+        random_word = random.choice(wn_data["list"])
         random_word = random_word.replace("_", " ")
         self.trigger_search(random_word)
 
@@ -189,102 +248,116 @@ class WordbookWindow(Adw.ApplicationWindow):
 
     def on_search_clicked(self, _button=None, pass_check=False, text=None):
         """Pass data to search function and set TextView data."""
+        if self._debounce_source is not None:
+            GLib.source_remove(self._debounce_source)
+            self._debounce_source = None
         if text is None:
             text = self._search_entry.get_text().strip()
         self._page_switch(Page.SPINNER)
         self._add_to_queue(text, pass_check)
 
-    def threaded_search(self, pass_check=False):
+    def threaded_search(self):
         """Manage a single thread to search for each term."""
-        except_list = ("fortune -a", "cowfortune")
         status = SearchStatus.NONE
-        while self._search_queue:
-            text = self._search_queue.pop(0)
-            orig_term = self._searched_term
-            self._searched_term = text
-            if text and (pass_check or not text == orig_term or text in except_list):
-
-                if not text.strip() == "":
-                    GLib.idle_add(self._def_view.set_markup, "")
-
-                    out = self._search(text)
-
-                    if out is None:
-                        status = SearchStatus.RESET
-                        continue
-
-                    def validate_result(text, out_string):
-                        # Add to history
-                        history_object = HistoryObject(text)
-                        if text not in self._search_history_list:
-                            self._search_history_list.append(text)
-                            self._search_history.insert(0, history_object)
-
-                        GLib.idle_add(self._def_view.set_markup, out_string)
-                        return SearchStatus.SUCCESS
-
-                    if out["out_string"] is not None:
-                        status = validate_result(text, out["out_string"])
-                    elif out["result"] is not None:
-                        status = validate_result(
-                            text, self._process_result(out["result"])
-                        )
-                    else:
-                        status = SearchStatus.FAILURE
-                        self._last_search_fail = True
-                        continue
-
-                    term_view_text = (
-                        f'<span size="large" weight="bold">{out["term"].strip()}</span>'
-                    )
-                    GLib.idle_add(
-                        self._term_view.set_markup,
-                        term_view_text,
-                    )
-                    GLib.idle_add(
-                        self._term_view.set_tooltip_markup,
-                        term_view_text,
-                    )
-
-                    pron = (
-                        "<i>" + out["pronunciation"].strip().replace("\n", "") + "</i>"
-                    )
-                    GLib.idle_add(
-                        self._pronunciation_view.set_markup,
-                        pron,
-                    )
-                    GLib.idle_add(
-                        self._pronunciation_view.set_tooltip_markup,
-                        pron,
-                    )
-
-                    if text not in except_list:
-                        GLib.idle_add(self._speak_button.set_visible, True)
-
-                    self._last_search_fail = False
-                    continue
-
-                status = SearchStatus.RESET
-                continue
-
-            if text and text == orig_term and not self._last_search_fail:
-                status = SearchStatus.SUCCESS
-                continue
-
-            if text and text == orig_term and self._last_search_fail:
-                status = SearchStatus.FAILURE
-                continue
-
-            status = SearchStatus.RESET
+        generation = None
+        while True:
+            with self._queue_lock:
+                if not self._search_queue:
+                    self._active_search = None
+                    break
+                text, generation, pass_check = self._search_queue.pop(0)
+            status = self._run_search(text, generation, pass_check, status)
 
         if status == SearchStatus.SUCCESS:
-            self._page_switch(Page.CONTENT)
+            self._deliver(generation, self._page_switch, Page.CONTENT)
         elif status == SearchStatus.FAILURE:
-            self._page_switch(Page.SEARCH_FAIL)
+            self._deliver(generation, self._page_switch, Page.SEARCH_FAIL)
         elif status == SearchStatus.RESET:
-            self._page_switch(Page.WELCOME)
-
-        self._active_thread = None
+            self._deliver(generation, self._page_switch, Page.WELCOME)
+
+    def _run_search(self, text, generation, pass_check, status):
+        """Handle one queued search and return the status it leaves behind."""
+        orig_term = self._searched_term
+        self._searched_term = text
+        if text and (pass_check or not text == orig_term or text in _EXCEPT_LIST):
+            if text.strip() == "":
+                return SearchStatus.RESET
+            return self._look_up(text, generation, orig_term, status)
+
+        if text and text == orig_term and not self._last_search_fail:
+            return SearchStatus.SUCCESS
+
+        if text and text == orig_term and self._last_search_fail:
+            return SearchStatus.FAILURE
+
+        return SearchStatus.RESET
+
+    def _look_up(self, text, generation, orig_term, status):
+        """Look a term up, showing its definition as it streams in."""
+
+        def cancelled():
+            """Check whether a newer search has made this one obsolete."""
+            return generation != self._search_generation
+
+        self._deliver(generation, self._def_view.set_markup, "")
+        streamed = None
+
+        def on_chunk(term, out_string):
+            """Show each part of speech as soon as it's ready."""
+            nonlocal streamed
+            if streamed is None:
+                self._show_term(generation, term)
+                self._deliver(generation, self._pronunciation_view.set_markup, "")
+                self._deliver(generation, self._page_switch, Page.CONTENT)
+            streamed = out_string
+            self._deliver(generation, self._def_view.set_markup, out_string)
+
+        start_time = time.perf_counter()
+        try:
+            with trace.span("search", text):
+                out = self._search(text, cancelled, on_chunk)
+            if out is not None and cancelled():
+                raise base.LookupCancelled
+        except base.LookupCancelled:
+            self._searched_term = orig_term
+            self._count_lookup(delivered=False)
+            return status
+
+        if out is None:
+            return SearchStatus.RESET
+        self._count_lookup(delivered=True)
+        if self._lookups_delivered == 1:
+            utils.startup_phase("first lookup", start_time)
+
+        if out["out_string"] is None:
+            self._last_search_fail = True
+            self._show_suggestions(generation, text)
+            return SearchStatus.FAILURE
+
+        self._show_result(text, generation, out, streamed)
+        return SearchStatus.SUCCESS
+
+    def _show_result(self, text, generation, out, streamed):
+        """Show a definition that was found, with its term and pronunciation."""
+        # Add to history
+        SearchHistory.get().add(text)
+        GLib.idle_add(self._add_to_history_list, text)
+
+        if out["out_string"] != streamed:
+            self._deliver(generation, self._def_view.set_markup, out["out_string"])
+
+        self._show_term(generation, out["term"], out.get("base_forms"))
+
+        pron = out["pronunciation"] or _("Is espeak-ng installed?")
+        pron = "<i>" + pron.strip().replace("\n", "") + "</i>"
+        self._deliver(generation, self._pronunciation_view.set_markup, pron)
+        self._deliver(generation, self._pronunciation_view.set_tooltip_markup, pron)
+
+        if text not in _EXCEPT_LIST:
+            self._deliver(generation, self._speak_button.set_visible, True)
+            self._prefetch_links(generation, out["out_string"])
+
+        self._last_search_fail = False
 
     def trigger_search(self, text):
         """Trigger search action."""
@@ -319,21 +392,34 @@ class WordbookWindow(Adw.ApplicationWindow):
 
     def _on_destroy(self, _window):
         """Detect closing of the window."""
-        Settings.get().history = self._search_history_list[-10:]
+        self._closing = True
+        for token in (self._prefetch_token, self._store_token):
+            if token is not None:
+                token.cancel()
 
     def _on_entry_changed(self, _entry):
         """Detect changes to text and do live search if enabled."""
 
         self._completion_request_count += 1
         if self._completion_request_count == 1:
-            threading.Thread(
-                target=self._update_completions,
-                args=[self._search_entry.get_text()],
-                daemon=True,
-            ).start()
+            Scheduler.get().submit(
+                self._update_completions,
+                self._search_entry.get_text(),
+                priority=COMPLETION,
+            )
 
         if Settings.get().live_search:
-            GLib.idle_add(self.on_search_clicked)
+            if self._debounce_source is not None:
+                GLib.source_remove(self._debounce_source)
+            self._debounce_source = GLib.timeout_add(
+                Settings.get().live_search_delay, self._on_debounce_timeout
+            )
+
+    def _on_debounce_timeout(self):
+        """Search once typing has paused for the live search delay."""
+        self._debounce_source = None
+        self.on_search_clicked()
+        return GLib.SOURCE_REMOVE
 
     @staticmethod
     def _on_exit_clicked(_widget):
@@ -364,11 +450,89 @@ class WordbookWindow(Adw.ApplicationWindow):
             return Gdk.EVENT_STOP
         return Gdk.EVENT_PROPAGATE
 
+    def _on_history_edge_reached(self, _scrolled_window, position):
+        """Show older history entries when the end of the list is reached."""
+        if position == Gtk.PositionType.BOTTOM:
+            self._load_history_page()
+
     def _on_history_item_activated(self, _widget, row):
         """Handle history item clicks."""
         term = row.get_first_child().get_first_child().get_label()
         self.trigger_search(term)
 
+    def _load_wn(self):
+        """Start loading WordNet and enable searching."""
+        self._render_cache.clear()  # Rendered from the WordNet being replaced.
+        self._wn_future = base.get_wn_file(self._retry_dl_wn, Settings.get().lexicons)
+        self._wn_future.add_done_callback(self._on_wn_ready)
+        with self._queue_lock:
+            self._start_search()
+        self._set_header_sensitive(True)
+        if self.lookup_term:
+            self.trigger_search(self.lookup_term)
+        self._search_entry.grab_focus_without_selecting()
+        return GLib.SOURCE_REMOVE
+
+    def _on_wn_ready(self, future):
+        """Precompile definitions in the background once WordNet is ready."""
+        if future.cancelled():
+            return  # The scheduler was shut down before WordNet loaded.
+        # Runs on the worker that loaded WordNet, where an error would go unseen.
+        error = future.exception()
+        if error is not None:
+            utils.log_error(f"Couldn't load WordNet: {error!r}")
+            GLib.idle_add(self._new_error, _("Couldn't load WordNet"), str(error))
+            return
+        wn_data = future.result()
+        if wn_data is not None:
+            self._suggestion_future = base.build_suggestion_index(wn_data["list"])
+        if wn_data is not None and Settings.get().definition_store:
+            self._store_token = CancellationToken()
+            base.build_definition_store(
+                wn_data["instance"],
+                wn_data["list"],
+                self._store_token,
+                token=self._store_token,
+            )
+
+    def _on_install_file_clicked(self, _widget):
+        """Let the user pick a WordNet archive downloaded beforehand."""
+        self._archive_chooser = Gtk.FileChooserNative.new(
+            _("Install WordNet from File"),
+            self,
+            Gtk.FileChooserAction.OPEN,
+            _("_Install"),
+            None,
+        )
+        archive_filter = Gtk.FileFilter()
+        archive_filter.set_name(_("WordNet archives"))
+        for pattern in ("*.xml", "*.xml.gz", "*.xml.xz"):
+            archive_filter.add_pattern(pattern)
+        self._archive_chooser.add_filter(archive_filter)
+        self._archive_chooser.connect("response", self._on_archive_chosen)
+        self._archive_chooser.show()
+
+    def _on_archive_chosen(self, chooser, response):
+        """Install WordNet from the chosen archive."""
+        if response == Gtk.ResponseType.ACCEPT:
+            self._page_switch(Page.DOWNLOAD)
+            self._dl_wn(chooser.get_file().get_path())
+        self._archive_chooser = None
+
+    def _on_text_chosen(self, chooser, response):
+        """List the words of the chosen text file."""
+        if response == Gtk.ResponseType.ACCEPT and self._wn_future is not None:
+            from wordbook.vocabulary_window import VocabularyWindow
+
+            window = VocabularyWindow(
+                self,
+                chooser.get_file().get_path(),
+                self._wn_future,
+                transient_for=self,
+            )
+            window.present()
+        self._text_chooser = None
+
     def _on_retry_clicked(self, _widget):
         """Handle retry button click in network failure page."""
         self._page_switch(Page.DOWNLOAD)
@@ -376,16 +540,60 @@ class WordbookWindow(Adw.ApplicationWindow):
 
     def _add_to_queue(self, text, pass_check=False):
         """Add search term to queue."""
-        if self._search_queue:
-            self._search_queue.pop(0)
-        self._search_queue.append(text)
-
-        if self._active_thread is None:
-            # If there is no active thread, create one and start it.
-            self._active_thread = threading.Thread(
-                target=self.threaded_search, args=[pass_check], daemon=True
+        with self._queue_lock:
+            # A new search makes every older one, queued or running, obsolete.
+            self._search_generation += 1
+            if self._search_queue:
+                self._search_queue.pop(0)
+            self._search_queue.append((text, self._search_generation, pass_check))
+            if self._prefetch_token is not None:
+                self._prefetch_token.cancel()
+            self._start_search()
+
+    def _start_search(self):
+        """
+        Start the search thread if there is something to search for.
+
+        Searches made before WordNet starts loading stay queued until it does.
+        The caller holds _queue_lock.
+        """
+        if (
+            self._active_search is None
+            and self._search_queue
+            and self._wn_future is not None
+        ):
+            self._active_search = Scheduler.get().submit(
+                self.threaded_search, priority=INTERACTIVE
             )
-            self._active_thread.start()
+
+    def _wn_data(self):
+        """Return the loaded WordNet data, or None if it isn't available."""
+        wn_future = self._wn_future
+        if wn_future is None:
+            return None  # WordNet hasn't started loading yet.
+        return wn_future.result()
+
+    def _count_lookup(self, delivered):
+        """Record whether a lookup was shown or thrown away as stale."""
+        if delivered:
+            self._lookups_delivered += 1
+        else:
+            self._lookups_wasted += 1
+        utils.log_debug(
+            f"Lookups: {self._lookups_delivered} delivered, "
+            f"{self._lookups_wasted} wasted on obsolete searches."
+        )
+
+    def _deliver(self, generation, func, *args):
+        """Run func on the main loop, unless a newer search has started by then."""
+
+        def deliver():
+            if generation == self._search_generation:
+                with trace.span("ui update"):
+                    func(*args)
+            return GLib.SOURCE_REMOVE
+
+        GLib.idle_add(deliver)
 
     def _on_scroll_event(self, adjustment):
         """Add or remove top border in window depending on scroll position."""
@@ -396,22 +604,78 @@ class WordbookWindow(Adw.ApplicationWindow):
 
     def _on_speak_clicked(self, _button):
         """Say the search entry out loud with espeak speech synthesis."""
-        base.read_term(
+        Scheduler.get().submit(
+            base.read_term,
             self._searched_term,
             speed="120",
             accent=Settings.get().pronunciations_accent,
+            priority=PRONUNCIATION,
         )
 
     def progress_complete(self):
         """Run upon completion of loading."""
         GLib.idle_add(self.download_status_page.set_title, _("Ready."))
-        self._wn_future = base.get_wn_file(self._retry_dl_wn)
+        self._render_cache.clear()  # Rendered from the WordNet being replaced.
+        self._wn_future = base.get_wn_file(self._retry_dl_wn, Settings.get().lexicons)
+        self._wn_future.add_done_callback(self._on_wn_ready)
+        with self._queue_lock:
+            self._start_search()
         GLib.idle_add(self._set_header_sensitive, True)
         self._page_switch(Page.WELCOME)
         if self.lookup_term:
             self.trigger_search(self.lookup_term)
         self._search_entry.grab_focus_without_selecting()
 
+    def _load_history_page(self):
+        """Add the next page of older history entries to the list."""
+        if self._history_loading:
+            return
+        self._history_loading = True
+
+        def show_page():
+            # Pages are taken on the main thread, so they can't race insertions.
+            terms = SearchHistory.get().page(
+                self._search_history.get_n_items(), HISTORY_PAGE_SIZE
+            )
+            for term in terms:
+                if term not in self._history_objects:
+                    history_object = HistoryObject(term)
+                    self._history_objects[term] = history_object
+                    self._search_history.append(history_object)
+            self._history_paged = True
+            self._history_loading = False
+            self._update_history_stack()
+            return GLib.SOURCE_REMOVE
+
+        def read_history():
+            SearchHistory.get().load()
+            GLib.idle_add(show_page)
+
+        Scheduler.get().submit(read_history, priority=COMPLETION)
+
+    def _add_to_history_list(self, term):
+        """Move a searched term to the top of the history list."""
+        if not self._history_paged:
+            return GLib.SOURCE_REMOVE  # The first page will include it.
+        history_object = self._history_objects.get(term)
+        if history_object is None:
+            history_object = HistoryObject(term)
+            self._history_objects[term] = history_object
+        else:
+            found, position = self._search_history.find(history_object)
+            if found:
+                self._search_history.remove(position)
+        self._search_history.insert(0, history_object)
+        self._update_history_stack()
+        return GLib.SOURCE_REMOVE
+
+    def _update_history_stack(self):
+        """Show the history list, or a placeholder if it is empty."""
+        if self._search_history.get_n_items():
+            self._history_stack.set_visible_child_name("list")
+        else:
+            self._history_stack.set_visible_child_name("empty")
+
     @staticmethod
     def _create_label(element):
         """Create labels for history list."""
@@ -426,6 +690,10 @@ class WordbookWindow(Adw.ApplicationWindow):
         box.append(label)
         return box
 
+    def _on_cdef_changed(self):
+        """Drop rendered definitions once the custom definitions have changed."""
+        self._render_cache.clear()
+
     def _new_error(self, primary_text, seconday_text):
         """Show an error dialog."""
         dialog = Gtk.MessageDialog(
@@ -444,56 +712,46 @@ class WordbookWindow(Adw.ApplicationWindow):
         GLib.idle_add(self._stack.set_visible_child_name, page)
         return False
 
-    def _process_result(self, result: dict):
-        """Process results from wn."""
-        out_string = ""
-        word_col = result["word_col"]
-        sen_col = result["sen_col"]
-        first = True
-        for pos in result.keys():
-            i = 0
-            orig_synset = None
-            if pos not in ("word_col", "sen_col") and result[pos]:
-                for synset in sorted(result[pos], key=lambda k: k["name"]):
-                    synset_name = synset["name"]
-                    if orig_synset is None:
-                        i = 1
-                        if not first:
-                            out_string += "\n\n"
-                        out_string += f"{synset_name} ~ <b>{pos}</b>"
-                        orig_synset = synset_name
-                        first = False
-                    elif synset_name != orig_synset:
-                        i = 1
-                        out_string += f"\n\n{synset_name} ~ <b>{pos}</b>"
-                        orig_synset = synset_name
-                    else:
-                        i += 1
-                    out_string += f'\n  <b>{i}</b>: {synset["definition"]}'
-
-                    for example in synset["examples"]:
-                        out_string += (
-                            f'\n        <span foreground="{sen_col}">{example}</span>'
-                        )
-
-                    pretty_syn = self._process_word_links(synset["syn"], word_col)
-                    if pretty_syn:
-                        out_string += f"\n        Synonyms:<i> {pretty_syn}</i>"
-
-                    pretty_ant = self._process_word_links(synset["ant"], word_col)
-                    if pretty_ant:
-                        out_string += f"\n        Antonyms:<i> {pretty_ant}</i>"
-
-                    pretty_sims = self._process_word_links(synset["sim"], word_col)
-                    if pretty_sims:
-                        out_string += f"\n        Similar to:<i> {pretty_sims}</i>"
-
-                    pretty_alsos = self._process_word_links(
-                        synset["also_sees"], word_col
-                    )
-                    if pretty_alsos:
-                        out_string += f"\n        Also see:<i> {pretty_alsos}</i>"
-        return out_string
+    def _process_pos(self, pos, synsets, word_col, sen_col):
+        """Process the results from wn for a single part of speech."""
+        out = []
+        i = 0
+        orig_synset = None
+        for synset in sorted(synsets, key=lambda k: k["name"]):
+            synset_name = synset["name"]
+            if orig_synset is None:
+                i = 1
+                out.append(f"{synset_name} ~ <b>{pos}</b>")
+                orig_synset = synset_name
+            elif synset_name != orig_synset:
+                i = 1
+                out.append(f"\n\n{synset_name} ~ <b>{pos}</b>")
+                orig_synset = synset_name
+            else:
+                i += 1
+            out.append(f'\n  <b>{i}</b>: {synset["definition"]}')
+            if "lexicon" in synset:
+                out.append(f' <span size="small">({escape(synset["lexicon"])})</span>')
+
+            for example in synset["examples"]:
+                out.append(f'\n        <span foreground="{sen_col}">{example}</span>')
+
+            pretty_syn = self._process_word_links(synset["syn"], word_col)
+            if pretty_syn:
+                out.append(f"\n        Synonyms:<i> {pretty_syn}</i>")
+
+            pretty_ant = self._process_word_links(synset["ant"], word_col)
+            if pretty_ant:
+                out.append(f"\n        Antonyms:<i> {pretty_ant}</i>")
+
+            pretty_sims = self._process_word_links(synset["sim"], word_col)
+            if pretty_sims:
+                out.append(f"\n        Similar to:<i> {pretty_sims}</i>")
+
+            pretty_alsos = self._process_word_links(synset["also_sees"], word_col)
+            if pretty_alsos:
+                out.append(f"\n        Also see:<i> {pretty_alsos}</i>")
+        return "".join(out)
 
     @staticmethod
     def _process_word_links(word_list, word_col):
@@ -510,17 +768,12 @@ class WordbookWindow(Adw.ApplicationWindow):
             return pretty_list
         return ""
 
-    def _search(self, search_text):
+    def _search(self, search_text, cancelled=None, on_chunk=None):
         """Clean input text, give errors and pass data to reactor."""
-        text = base.cleaner(search_text)
+        with trace.span("cleaner", search_text):
+            text = base.cleaner(search_text)
         if not text == "" and not text.isspace():
-            return base.reactor(
-                text,
-                self._style_manager.get_dark(),
-                self._wn_future.result()["instance"],
-                Settings.get().cdef,
-                accent=Settings.get().pronunciations_accent,
-            )
+            return self._render(text, cancelled, on_chunk)
         if not Settings.get().live_search:
             GLib.idle_add(
                 self._new_error,
@@ -530,30 +783,122 @@ class WordbookWindow(Adw.ApplicationWindow):
         self._searched_term = None
         return None
 
+    def _render(self, text, cancelled=None, on_chunk=None, prefetch=False):
+        """Return the rendered definition of a clean term, cached if possible."""
+        dark_font = self._style_manager.get_dark()
+        cdef = Settings.get().cdef
+        accent = Settings.get().pronunciations_accent
+        cache_key = (text, dark_font, accent, cdef)
+
+        cdef_generation = CustomDefinitions.get().generation
+        out = self._render_cache.get(cache_key)
+        trace.mark(out is not None)
+        if out is not None:
+            if prefetch:
+                return None  # Nothing left to do ahead of time.
+            if out.pop("prefetched", False):
+                self._prefetches_used += 1
+                utils.log_debug(
+                    f"Prefetch: {self._prefetches_used} of {self._prefetches_done} "
+                    "prefetched lookups were used "
+                    f"({self._prefetches_used / self._prefetches_done:.0%} hit rate)."
+                )
+        else:
+            rendered = []
+
+            def render_chunk(term, pos, result):
+                """Render each part of speech once, as soon as it's ready."""
+                with trace.span("markup", text):
+                    rendered.append(
+                        self._process_pos(
+                            pos, result[pos], result["word_col"], result["sen_col"]
+                        )
+                    )
+                if on_chunk is not None:
+                    on_chunk(term, "\n\n".join(rendered))
+
+            wn_data = self._wn_data()
+            if wn_data is None:
+                return None
+            out = base.reactor(
+                text,
+                dark_font,
+                wn_data["instance"],
+                cdef,
+                accent=accent,
+                cancelled=cancelled,
+                on_chunk=render_chunk,
+            )
+            if out is not None and out.get("result") is not None:
+                out = {
+                    "term": out["term"],
+                    "base_forms": out.get("base_forms"),
+                    "pronunciation": out["pronunciation"],
+                    "out_string": "\n\n".join(rendered),
+                }
+            # Misses aren't kept, so a term shows up as soon as it's defined,
+            # and neither is anything rendered from outdated custom definitions.
+            if (
+                out is not None
+                and out["out_string"] is not None
+                and text not in _EXCEPT_LIST
+                and cdef_generation == CustomDefinitions.get().generation
+            ):
+                if prefetch:
+                    out["prefetched"] = True  # Counted as a hit on first use.
+                    self._prefetches_done += 1
+                self._render_cache.put(cache_key, out)
+        utils.log_debug(self._render_cache.stats())
+        return out
+
+    def _prefetch_links(self, generation, out_string):
+        """Look up the words linked from a result before they are clicked."""
+        terms = list(dict.fromkeys(_LINK_PATTERN.findall(out_string)))
+        with self._queue_lock:
+            if generation != self._search_generation or self._closing:
+                return
+            if self._prefetch_token is not None:
+                self._prefetch_token.cancel()
+            # Cancelled as soon as the user searches for something else.
+            token = self._prefetch_token = CancellationToken()
+        Scheduler.get().submit(
+            self._prefetch,
+            terms[:PREFETCH_BUDGET],
+            token,
+            priority=BACKGROUND,
+            token=token,
+        )
+
+    def _prefetch(self, terms, cancelled):
+        """Render the given link targets until a foreground search comes along."""
+        for term in terms:
+            if cancelled():
+                return
+            try:
+                with trace.span("prefetch", term):
+                    self._render(base.cleaner(term), cancelled, prefetch=True)
+            except base.LookupCancelled:
+                return
+
     def _update_completions(self, text):
         """Update completions from wordlist and cdef folder."""
         while self._completion_request_count > 0:
+            wn_data = self._wn_data()
+            if wn_data is None:
+                # Dropped until WordNet is loaded, when the next keystroke asks again.
+                self._completion_request_count = 0
+                return
             completer_liststore = Gtk.ListStore(str)
-            _complete_list = []
-
-            for item in self._wn_future.result()["list"]:
-                if len(_complete_list) >= 10:
-                    break
-                item = item.replace("_", " ")
-                if item.lower().startswith(text.lower()) and item not in _complete_list:
-                    _complete_list.append(item)
+            _complete_list = wn_data["index"].complete(text, 10)
 
             if Settings.get().cdef:
-                for item in os.listdir(utils.CDEF_DIR):
-                    # FIXME: There is no indicator that this is a custom definition
-                    # Not a priority but a nice-to-have.
+                # FIXME: There is no indicator that this is a custom definition
+                # Not a priority but a nice-to-have.
+                for item in CustomDefinitions.get().complete(text, 10):
                     if len(_complete_list) >= 10:
                         break
-                    item = escape(item).replace("_", " ")
-                    if (
-                        item.lower().startswith(text.lower())
-                        and item not in _complete_list
-                    ):
+                    item = escape(item)
+                    if item not in _complete_list:
                         _complete_list.append(item)
 
             _complete_list = sorted(_complete_list, key=str.casefold)
@@ -564,24 +909,64 @@ class WordbookWindow(Adw.ApplicationWindow):
             GLib.idle_add(self.completer.set_model, completer_liststore)
             GLib.idle_add(self.completer.complete)
 
+    def _show_term(self, generation, term, base_forms=None):
+        """Show the term being defined in the header of the content page."""
+        term_view_text = f'<span size="large" weight="bold">{term.strip()}</span>'
+        if base_forms is not None:
+            # The search was for an inflected form, such as "geese".
+            searched = GLib.markup_escape_text(self._searched_term or "")
+            note = _("from “{}”").format(searched)
+            term_view_text += f' <span size="small">{note}</span>'
+        self._deliver(generation, self._term_view.set_markup, term_view_text)
+        self._deliver(generation, self._term_view.set_tooltip_markup, term_view_text)
+
+    def _show_suggestions(self, generation, text):
+        """Offer close matches for a term that couldn't be found."""
+        text = base.cleaner(text)
+        suggestions = []
+        if Settings.get().cdef:
+            suggestions.extend(CustomDefinitions.get().suggest(text))
+        if self._suggestion_future is not None and self._suggestion_future.done():
+            suggestions.extend(self._suggestion_future.result().suggest(text))
+        suggestions = list(dict.fromkeys(suggestions))[:5]
+
+        links = ", ".join(
+            f'<a href="search;{escape(word)}">{escape(word)}</a>'
+            for word in suggestions
+        )
+        self._deliver(
+            generation,
+            self._suggestions_label.set_markup,
+            _("Did you mean: {}?").format(links) if suggestions else "",
+        )
+        self._deliver(
+            generation, self._suggestions_label.set_visible, bool(suggestions)
+        )
+
     def _set_header_sensitive(self, status):
         """Disable/enable header buttons."""
         self._title_clamp.set_sensitive(status)
         self._flap_toggle_button.set_sensitive(status)
         self._menu_button.set_sensitive(status)
 
-    def _dl_wn(self):
-        """Download WordNet data."""
+    def _dl_wn(self, archive=None):
+        """Download WordNet data, or install it from a local archive."""
         self._set_header_sensitive(False)
         if not self._wn_downloader.check_status():
             self.download_status_page.set_description(_("Downloading WordNet…"))
-            threading.Thread(target=self._try_dl_wn).start()
+            Scheduler.get().submit(self._try_dl_wn, archive, priority=BACKGROUND)
 
-    def _try_dl_wn(self):
+    def _try_dl_wn(self, archive=None):
         """Attempt to download WordNet data."""
+        # wn is slow to import, so it's only pulled in when a download is needed.
+        from wn import Error
+
+        from wordbook.download import VerificationError
+        from wordbook.progress import ProgressUpdater
+
         try:
-            self._wn_downloader.download(ProgressUpdater)
-        except Error as err:
+            self._wn_downloader.download(ProgressUpdater, archive)
+        except (Error, OSError, VerificationError) as err:
             self._network_fail_status_page.set_description(
                 f"<small><tt>Error: {err}</tt></small>"
             )
@@ -624,34 +1009,3 @@ class HistoryObject(GObject.Object):
     def __init__(self, term):
         super().__init__()
         self.term = term
-
-
-class ProgressUpdater(ProgressHandler):
-    def update(self, n: int = 1, force: bool = False):
-        """Update the progress bar."""
-        self.kwargs["count"] += n
-        if self.kwargs["total"] > 0:
-            progress_fraction = self.kwargs["count"] / self.kwargs["total"]
-            GLib.idle_add(
-                Gio.Application.get_default().win.loading_progress.set_fraction,
-                progress_fraction,
-            )
-
-    @staticmethod
-    def flash(message):
-        """Update the progress label."""
-        if message == "Database":
-            GLib.idle_add(
-                Gio.Application.get_default().win.download_status_page.set_description,
-                _("Building Database…"),
-            )
-        else:
-            GLib.idle_add(
-                Gio.Application.get_default().win.download_status_page.set_description,
-                message,
-            )
-
-    def close(self):
-        """Signal the completion of building the WordNet database."""
-        if self.kwargs["message"] not in ("Download", "Read"):
-            Gio.Application.get_default().win.progress_complete()